@@ -0,0 +1,189 @@
+#
+# Copyright 2026 Gabor Buella
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# 1. Redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# “AS IS” AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED
+# TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+# PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE,
+# EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+# Times the loaders and the hot paths of write.py and dp.py on synthetic
+# decks, printing one JSON object per measurement:
+#
+#   python bench.py -n 1000 100000 -l 1000000 -o bench_output.txt
+
+import sys
+import os
+import argparse
+import json
+import random
+import subprocess
+import tempfile
+import time
+from datetime import datetime
+import dp
+import write
+
+def gen_deck(path, count, id):
+	with open(path, 'w', newline='') as f:
+		f.write('id\t{}\n'.format(id))
+		for i in range(0, count):
+			if i % 3 == 0:
+				f.write('term{}\tdefinition {}\n'.format(i, i))
+			else:
+				f.write('term{}\tdefinition {}\t{}\t{}\n'.format(i, i,
+					random.randint(1, 900), 739000 + random.randint(0, 900)))
+
+def gen_log(path, id, terms, lines):
+	day = 739900
+	with open(path, 'w', newline='') as f:
+		f.write('id\t{}\n'.format(id))
+		out = []
+		for i in range(0, lines):
+			if i % 10000 == 9999:
+				out.append('id\t{}\n'.format(id))
+				day = day + 1
+			out.append('{}\t{}\t{}\n'.format(random.randrange(terms),
+				random.choice((0, 1, 4, 8, 84)), day))
+			if len(out) >= 65536:
+				f.write(''.join(out))
+				out = []
+		f.write(''.join(out))
+
+def gen_nouns(path, count):
+	with open(path, 'w', newline='') as f:
+		f.write('# vim: set tabstop=15:\n')
+		for i in range(0, count):
+			f.write('\n{}\tf\tnoun {}\n'.format(i, i))
+			for case in dp.cases:
+				f.write('{}\tforma{}\tformy{}\n'.format(case, i, i))
+
+def measure(name, size, func, repeat=1):
+	start = time.perf_counter()
+	for i in range(0, repeat):
+		result = func()
+	elapsed = time.perf_counter() - start
+	return result, {'name': name, 'size': size, 'repeat': repeat,
+		'seconds': elapsed, 'per_op': elapsed / repeat}
+
+def bench_write(dir, count, log_lines, ops):
+	path = os.path.join(dir, 'deck{}.csv'.format(count))
+	logpath = path + '.log'
+	gen_deck(path, count, 7)
+	gen_log(logpath, 7, count, log_lines)
+	args = argparse.Namespace(path=path, start=0, end=0, target_count=1000)
+	(id, terms), m = measure('read_terms', count, lambda: write.read_terms(args))
+	yield m
+	_, m = measure('readlog', log_lines,
+		lambda: write.readlog(logpath, terms, id))
+	yield m
+	write.convert_log(logpath, terms)
+	_, m = measure('readlog_binary', log_lines,
+		lambda: write.readlog(logpath, write.copy_terms(terms), id))
+	yield m
+	_, m = measure('fill_totals', count,
+		lambda: write.fill_totals(terms, 1000000))
+	yield m
+	total = write.total_sum(terms)
+	picks = [random.randint(1, total) for i in range(0, ops)]
+	_, m = measure('find_term_index', count,
+		lambda: [write.find_term_index(terms, p) for p in picks])
+	m['per_op'] = m['seconds'] / ops
+	yield m
+	indexes = [random.randrange(count) for i in range(0, ops)]
+	day = datetime.utcnow().toordinal()
+	_, m = measure('inc_term_score', count,
+		lambda: [write.inc_term_score(terms, i, 1000000, 4, day) for i in indexes])
+	m['per_op'] = m['seconds'] / ops
+	yield m
+	scheduler, m = measure('due_scheduler', count,
+		lambda: write.DueScheduler(terms, 1000000, today=day + 1000))
+	yield m
+	def due_answers():
+		for i in range(0, ops):
+			index = scheduler.pick()
+			if index is None:
+				return i
+			scheduler.answered(index, True, day)
+		return ops
+	done, m = measure('due_pick_answer', count, due_answers)
+	m['ops'] = done
+	m['per_op'] = m['seconds'] / max(1, done)
+	yield m
+	_, m = measure('overwrite_csv', count,
+		lambda: write.overwrite_csv(path, terms, id + 1))
+	yield m
+
+def bench_dp(dir, count):
+	path = os.path.join(dir, 'pldb{}.csv'.format(count))
+	gen_nouns(path, count)
+	_, m = measure('dp.read_nouns', count, lambda: dp.read_nouns(path))
+	yield m
+	_, m = measure('dp.load_cached_cold', count,
+		lambda: dp.load_cached(path, dp.read_nouns))
+	yield m
+	_, m = measure('dp.load_cached', count,
+		lambda: dp.load_cached(path, dp.read_nouns))
+	yield m
+	index, m = measure('dp.build_noun_index', count,
+		lambda: dp.build_noun_index(path))
+	yield m
+	start = count // 2
+	_, m = measure('dp.read_noun_range', 100,
+		lambda: dp.read_noun_range(path, index, start, start + 100))
+	yield m
+
+def git_revision():
+	try:
+		return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True,
+			text=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+	except OSError:
+		return ''
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description='benchmarks.')
+	parser.add_argument('-n', help='deck sizes', type=int, nargs='+',
+			default=[1000, 10000, 100000], dest='sizes')
+	parser.add_argument('-l', help='log lines', type=int, default=100000,
+			dest='log_lines')
+	parser.add_argument('-k', help='picks and score updates to time', type=int,
+			default=100000, dest='ops')
+	parser.add_argument('-o', help='output file, appended to', default='-',
+			dest='output')
+	parser.add_argument('-r', help='random seed', type=int, default=1,
+			dest='seed')
+	args = parser.parse_args()
+	random.seed(args.seed)
+	if args.output == '-':
+		out = sys.stdout
+	else:
+		out = open(args.output, 'a')
+	revision = git_revision()
+	with tempfile.TemporaryDirectory() as dir:
+		for size in args.sizes:
+			for m in bench_write(dir, size, args.log_lines, args.ops):
+				m['revision'] = revision
+				out.write(json.dumps(m) + '\n')
+				out.flush()
+			for m in bench_dp(dir, size):
+				m['revision'] = revision
+				out.write(json.dumps(m) + '\n')
+				out.flush()
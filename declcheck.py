@@ -0,0 +1,164 @@
+#
+# Copyright 2026 Gabor Buella
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# 1. Redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# “AS IS” AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED
+# TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+# PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE,
+# EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+# Checks the rules of decline.py against pldb.csv, printing the forms
+# that differ from the generated ones, or with -c writes a compacted
+# pldb.csv, relying on the rules wherever they agree. The nouns already
+# flagged 'gen' are only counted, test_declcheck.py pins their forms.
+#
+#   python declcheck.py -p pldb.csv -c pldb_compact.csv
+
+import sys
+import argparse
+import grammar
+import decline
+import dp
+
+# Compares the generated forms with the rows of a noun, returns the list
+# of the rows that differ, and the number of forms compared
+def verify(noun):
+	nominative = noun.decl[grammar.NOMINATIVE]
+	if noun.irregular or nominative is None:
+		return None
+	forms = decline.decline(nominative[0], grammar.genders[noun.gender])
+	if forms is None:
+		return None
+	differ = []
+	count = 0
+	for case, name in enumerate(grammar.cases):
+		if noun.decl[case] is None:
+			continue
+		row = [name] + list(noun.decl[case])
+		generated = forms[name][:len(row) - 1]
+		count = count + len(generated)
+		if row[1:] != generated:
+			differ.append((row, generated))
+	return differ, count
+
+# Yields the entries of pldb.csv, the lists of lines between empty lines
+def entries(lines):
+	entry = []
+	for line in lines:
+		if line.strip('\r\n') != '':
+			entry.append(line)
+			continue
+		yield entry
+		entry = []
+	yield entry
+
+# Tells if the forms of an entry are generated by the rules
+def is_generated(entry):
+	header = [line for line in entry if not line.startswith('#')]
+	if len(header) == 0:
+		return False
+	fields = header[0].rstrip('\r\n').split('\t')
+	return len(fields) == 4 and 'gen' in fields[3]
+
+# Rewrites pldb.csv with the 'gen' flag on the nouns the rules cover,
+# leaving out the rows that are generated the same. Everything else is
+# copied as it is.
+def compact(lines, out):
+	entry = []
+	for line in lines:
+		if line.strip('\r\n') != '':
+			entry.append(line)
+			continue
+		out.writelines(compact_entry(entry))
+		entry = []
+		out.write(line)
+	out.writelines(compact_entry(entry))
+
+def compact_entry(entry):
+	words = dp.parse_nouns(entry, 0)
+	if len(words) != 1:
+		return entry
+	word = words[0]
+	header = [i for i in range(0, len(entry)) if not entry[i].startswith('#')][0]
+	if is_generated(entry):
+		return entry
+	fields = entry[header].rstrip('\r\n').split('\t')
+	decl = word.decl
+	if (word.irregular or None in decl
+		or any(len(forms) != len(decl[grammar.NOMINATIVE]) for forms in decl)):
+		return entry
+	forms = decline.decline(decl[grammar.NOMINATIVE][0],
+		grammar.genders[word.gender])
+	if forms is None:
+		return entry
+	if len(fields) == 4:
+		fields[3] = fields[3] + ' gen'
+	else:
+		fields.append('gen')
+	result = entry[:header] + ['\t'.join(fields) + '\n']
+	for line in entry[header + 1:]:
+		row = line.rstrip('\r\n').split('\t')
+		if (line.startswith('#') or row[0] == 'nominative'
+			or row[1:] != forms[row[0]][:len(row) - 1]):
+			result.append(line)
+	if len(result) == len(entry):
+		return entry
+	return result
+
+parser = argparse.ArgumentParser(description='Check and apply the declension rules.')
+parser.add_argument('-p', help='CSV file path - nouns', default='pldb.csv',
+		dest='path')
+parser.add_argument('-c', help='write the compacted nouns to this file',
+		dest='compact_path')
+
+if __name__ == '__main__':
+	args = parser.parse_args()
+	with open(args.path, newline='') as f:
+		lines = f.readlines()
+	if args.compact_path is not None:
+		with open(args.compact_path, 'w', newline='') as out:
+			compact(lines, out)
+		sys.exit(0)
+	matched = 0
+	total = 0
+	flagged = 0
+	for entry in entries(lines):
+		nouns = dp.parse_nouns(entry, 0)
+		if len(nouns) != 1:
+			continue
+		noun = nouns[0]
+		if is_generated(entry):
+			flagged = flagged + 1
+			continue
+		result = verify(noun)
+		if result is None:
+			continue
+		differ, count = result
+		total = total + count
+		for row, generated in differ:
+			print('{}\t{}\t{}\t{}'.format(noun.id, row[0], ' '.join(row[1:]),
+				' '.join(generated)))
+			count = count - len(generated)
+		matched = matched + count
+	print('generated forms matching: {} of {}'.format(matched, total),
+		file=sys.stderr)
+	print('nouns flagged gen, not checked: {}'.format(flagged),
+		file=sys.stderr)
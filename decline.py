@@ -0,0 +1,286 @@
+#
+# Copyright 2026 Gabor Buella
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# 1. Redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# “AS IS” AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED
+# TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+# PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE,
+# EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+# Generates the regular noun paradigms from the nominative singular and
+# the gender. Only a subset of the declension classes is covered:
+#  - feminine nouns in -a, and in a soft or hardened consonant,
+#  - neuter nouns in -o and -e,
+#  - masculine nouns in a consonant, with the fleeting e of -ek and -ec,
+#    and the ó/o and ą/ę alternation of the last syllable.
+# Irregular words, and lexical choices like most of the -a/-u genitive of
+# the masculine inanimate nouns, are left to explicit rows in pldb.csv.
+#
+# A noun in pldb.csv with the 'gen' flag only needs the nominative row,
+# and the rows of the forms that differ from the generated ones, see
+# dp.parse_nouns, and declcheck.py for checking the rules against
+# pldb.csv.
+
+# Hard stem endings and their softened forms before the -e/-ie ending of
+# the locative, and the dative of the feminine nouns. The longer endings
+# come first.
+softened = (('st', 'ście'), ('zd', 'ździe'), ('sł', 'śle'), ('sn', 'śnie'),
+	('zn', 'źnie'), ('t', 'cie'), ('d', 'dzie'), ('r', 'rze'), ('ł', 'le'),
+	('b', 'bie'), ('p', 'pie'), ('f', 'fie'), ('w', 'wie'), ('m', 'mie'),
+	('n', 'nie'), ('s', 'sie'), ('z', 'zie'))
+
+velar_softened = {'k': 'ce', 'g': 'dze', 'ch': 'sze'}
+
+hardened_endings = ('cz', 'sz', 'rz', 'dz', 'dż', 'ż', 'c')
+velar_endings = ('ch', 'k', 'g')
+soft_consonants = {'ść': 'ści', 'ć': 'ci', 'ń': 'ni', 'ś': 'si', 'ź': 'zi'}
+vowels = 'aąeęioóuy'
+
+def stem_kind(stem):
+	if stem.endswith(hardened_endings):
+		return 'hardened'
+	if stem.endswith(velar_endings):
+		return 'velar'
+	if stem.endswith(('j', 'l', 'i')):
+		return 'soft'
+	return 'hard'
+
+def soften(stem):
+	for ending, replacement in softened:
+		if stem.endswith(ending):
+			return stem[:-len(ending)] + replacement
+	return None
+
+# The genitive plural of a stem in -k after a consonant gets a fleeting e
+def bare_stem(stem):
+	if len(stem) > 1 and stem[-1] == 'k' and stem[-2] not in vowels:
+		return stem[:-1] + 'ek'
+	return stem
+
+def plural_endings(stem):
+	return {'dative': stem + 'om', 'instrumental': stem + 'ami',
+		'locative': stem + 'ach'}
+
+def feminine_a(lemma):
+	stem = lemma[:-1]
+	kind = stem_kind(stem)
+	sg = {'nominative': lemma, 'accusative': stem + 'ę',
+		'instrumental': stem + 'ą', 'vocative': stem + 'o'}
+	pl = plural_endings(stem)
+	if kind == 'hard':
+		if soften(stem) is None:
+			return None
+		sg['genitive'] = stem + 'y'
+		sg['dative'] = soften(stem)
+		pl['nominative'] = stem + 'y'
+		pl['genitive'] = stem
+	elif kind == 'velar':
+		ending = 'ch' if stem.endswith('ch') else stem[-1]
+		vowel = 'y' if ending == 'ch' else 'i'
+		sg['genitive'] = stem + vowel
+		sg['dative'] = stem[:-len(ending)] + velar_softened[ending]
+		pl['nominative'] = stem + vowel
+		pl['genitive'] = bare_stem(stem)
+	elif kind == 'hardened':
+		sg['genitive'] = stem + 'y'
+		sg['dative'] = stem + 'y'
+		pl['nominative'] = stem + 'e'
+		if stem.endswith(('c', 'dz')):
+			pl['genitive'] = stem
+		else:
+			pl['genitive'] = stem + 'y'
+	else:
+		if stem.endswith('i'):
+			sg['genitive'] = stem
+			pl['genitive'] = stem[:-1]
+		elif stem.endswith('j') and len(stem) > 1 and stem[-2] in vowels:
+			sg['genitive'] = stem[:-1] + 'i'
+			pl['genitive'] = sg['genitive']
+		else:
+			sg['genitive'] = stem + 'i'
+			pl['genitive'] = sg['genitive']
+		sg['dative'] = sg['genitive']
+		pl['nominative'] = stem + 'e'
+	sg['locative'] = sg['dative']
+	pl['accusative'] = pl['nominative']
+	pl['vocative'] = pl['nominative']
+	return sg, pl
+
+def feminine_consonant(lemma):
+	sg = {'nominative': lemma, 'accusative': lemma}
+	pl = {}
+	for ending, replacement in soft_consonants.items():
+		if lemma.endswith(ending):
+			stem = lemma[:-len(ending)] + replacement
+			sg['genitive'] = stem
+			if ending == 'ń':
+				pl['nominative'] = stem + 'e'
+			else:
+				pl['nominative'] = stem
+			break
+	else:
+		if lemma.endswith('l'):
+			stem = lemma
+			sg['genitive'] = stem + 'i'
+			pl['nominative'] = stem + 'e'
+		elif stem_kind(lemma) == 'hardened':
+			stem = lemma
+			sg['genitive'] = stem + 'y'
+			pl['nominative'] = stem + 'e'
+		else:
+			return None
+	sg['dative'] = sg['genitive']
+	sg['instrumental'] = stem + 'ą'
+	sg['locative'] = sg['genitive']
+	sg['vocative'] = sg['genitive']
+	pl.update(plural_endings(stem))
+	pl['genitive'] = sg['genitive']
+	pl['accusative'] = pl['nominative']
+	pl['vocative'] = pl['nominative']
+	return sg, pl
+
+# The genitive plural of the neuter nouns in -e
+neuter_soft_endings = (('dzi', 'dź'), ('ni', 'ń'), ('ci', 'ć'), ('si', 'ś'),
+	('zi', 'ź'))
+
+def neuter(lemma):
+	stem = lemma[:-1]
+	kind = stem_kind(stem)
+	sg = {'nominative': lemma, 'genitive': stem + 'a', 'dative': stem + 'u',
+		'accusative': lemma, 'instrumental': stem + 'em', 'vocative': lemma}
+	pl = plural_endings(stem)
+	pl['nominative'] = stem + 'a'
+	if lemma.endswith('o'):
+		if kind == 'velar':
+			if not stem.endswith('ch'):
+				sg['instrumental'] = stem + 'iem'
+			sg['locative'] = stem + 'u'
+		elif kind == 'hard' and soften(stem) is not None:
+			sg['locative'] = soften(stem)
+		else:
+			return None
+		pl['genitive'] = bare_stem(stem)
+	else:
+		sg['locative'] = stem + 'u'
+		for ending, replacement in neuter_soft_endings:
+			if stem.endswith(ending):
+				pl['genitive'] = stem[:-len(ending)] + replacement
+				break
+		else:
+			if stem.endswith(('c', 'dz')):
+				pl['genitive'] = stem
+			elif kind == 'hardened':
+				pl['genitive'] = stem + 'y'
+			else:
+				return None
+	pl['accusative'] = pl['nominative']
+	pl['vocative'] = pl['nominative']
+	return sg, pl
+
+# The stem of the oblique cases of a masculine noun, None if it is not
+# covered
+def masculine_stem(lemma):
+	if lemma.endswith('niec'):
+		return lemma[:-4] + 'ńc'
+	if lemma.endswith('iec'):
+		return None
+	if lemma.endswith(('ek', 'ec')) and len(lemma) > 2 and lemma[-3] not in vowels:
+		return lemma[:-2] + lemma[-1]
+	if len(lemma) > 1 and lemma[-2] == 'ó' and lemma[-1] in 'bdgtzwr':
+		return lemma[:-2] + 'o' + lemma[-1]
+	if len(lemma) > 1 and lemma[-2] == 'ą' and lemma[-1] in 'dż':
+		return lemma[:-2] + 'ę' + lemma[-1]
+	return lemma
+
+def masculine(lemma, gender):
+	stem = masculine_stem(lemma)
+	if stem is None or lemma[-1] in vowels:
+		return None
+	kind = stem_kind(stem)
+	animate = gender != 'masculine_inanimate'
+	personal = gender == 'masculine_personal'
+	sg = {'nominative': lemma, 'dative': stem + 'owi',
+		'instrumental': stem + 'em'}
+	pl = plural_endings(stem)
+	# the inanimate nouns take -u, except the most common -a groups
+	if animate or kind in ('hardened', 'soft') or stem.endswith('nik'):
+		sg['genitive'] = stem + 'a'
+	else:
+		sg['genitive'] = stem + 'u'
+	if animate:
+		sg['accusative'] = sg['genitive']
+	else:
+		sg['accusative'] = lemma
+	if kind == 'hard':
+		if soften(stem) is None:
+			return None
+		sg['locative'] = soften(stem)
+	else:
+		sg['locative'] = stem + 'u'
+	if kind == 'velar' and not stem.endswith('ch'):
+		sg['instrumental'] = stem + 'iem'
+	sg['vocative'] = sg['locative']
+	if personal and lemma.endswith('ec'):
+		sg['vocative'] = stem[:-1] + 'cze'
+	if kind == 'hardened' and not stem.endswith('c') and not personal:
+		pl['genitive'] = stem + 'y'
+	elif kind == 'soft' and stem.endswith('l'):
+		pl['genitive'] = stem + 'i'
+	else:
+		pl['genitive'] = stem + 'ów'
+	if personal:
+		if stem.endswith('k'):
+			pl['nominative'] = stem[:-1] + 'cy'
+		elif stem.endswith('c'):
+			pl['nominative'] = stem + 'y'
+		else:
+			pl['nominative'] = stem + 'owie'
+		pl['accusative'] = pl['genitive']
+	else:
+		if kind == 'velar' and not stem.endswith('ch'):
+			pl['nominative'] = stem + 'i'
+		elif kind == 'hard' or kind == 'velar':
+			pl['nominative'] = stem + 'y'
+		else:
+			pl['nominative'] = stem + 'e'
+		pl['accusative'] = pl['nominative']
+	pl['vocative'] = pl['nominative']
+	return sg, pl
+
+# Returns a dict mapping the case names to the [singular, plural] forms,
+# or None if the word is not in a covered class
+def decline(lemma, gender):
+	if gender == 'feminine':
+		if lemma.endswith('a'):
+			forms = feminine_a(lemma)
+		else:
+			forms = feminine_consonant(lemma)
+	elif gender == 'neuter' and lemma.endswith(('o', 'e')):
+		forms = neuter(lemma)
+	elif gender in ('masculine_inanimate', 'masculine_animal',
+			'masculine_personal'):
+		forms = masculine(lemma, gender)
+	else:
+		return None
+	if forms is None:
+		return None
+	sg, pl = forms
+	return {case: [sg[case], pl[case]] for case in sg}
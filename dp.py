@@ -30,6 +30,21 @@ import atexit
 import argparse
 import csv
 import random
+import math
+import os
+import pickle
+import gc
+import io
+import bisect
+import time
+from array import array
+from collections import namedtuple
+import metrics
+import match
+import decline
+from grammar import (cases, numbers, genders, case_codes, number_codes,
+	gender_codes, NOMINATIVE, VOCATIVE, SINGULAR, PLURAL, adj_columns,
+	adj_column_codes, Noun, Adjective, Analysis)
 
 parser = argparse.ArgumentParser(description='Noun declensions.')
 parser.add_argument('-p', help='CSV file path - nouns', default='pldb.csv',
@@ -64,60 +79,110 @@ parser.add_argument('-M', help='hard nouns only', action='store_true',
 		dest='nounhardonly')
 parser.add_argument('-N', help='hard adjectives only', action='store_true',
 		dest='adjhardonly')
+parser.add_argument('-H', help='weight of the hard ones, a noun is drawn ceil(weight) times',
+		default=4, type=float, dest='hard_weight')
+parser.add_argument('-b', help='grade qid<TAB>response lines from a file, - for stdin',
+		dest='batch')
+parser.add_argument('-T', help='write timing metrics to this file, .prom or JSON',
+		dest='metrics')
+parser.add_argument('-C', help='do not use the database caches', action='store_true',
+		dest='nocache')
+parser.add_argument('-L', help='accept answers missing diacritics, or this many edits off, as near misses',
+		type=int, dest='tolerance')
+parser.add_argument('-I', help='show forms, ask for their case and number',
+		action='store_true', dest='identify')
 
-args = parser.parse_args()
+def gender_set(*names):
+	return frozenset(gender_codes[name] for name in names)
 
-nouns = []
-preps = {}
-adjs = []
-hard_nouns = set()
-hard_adjs = set()
-hard_change = False
+masculine_genders = gender_set('masculine_personal', 'masculine_animal',
+	'masculine_inanimate')
+# nouns without singular forms
+plurale_genders = gender_set('viril_plural', 'nonviril_plural')
+# the forms in the first column are plural
+plural_only_genders = gender_set('viril_plural', 'nonviril_plural',
+	'pronoun_plural', 'numeral_plural')
+singular_only_genders = gender_set('pronoun', 'numeral')
+no_adj_genders = gender_set('pronoun', 'pronoun_plural', 'numeral',
+	'numeral_plural')
+no_prep_genders = gender_set('numeral', 'numeral_plural')
+common_plural_cases = frozenset(case_codes[name] for name in
+	('nominative', 'genitive', 'accusative'))
 
-with open(args.hard_path, newline='') as csvfile:
-	datareader = csv.reader(csvfile, delimiter='\t', quotechar='|')
-	for row in datareader:
-		if (len(row) == 0 or row[0].startswith('#')):
-			continue
-		if row[0] == 'adj':
-			for i in range(1, len(row)):
-				hard_adjs.add(int(row[i]))
-		elif row[0] == 'noun':
-			for i in range(1, len(row)):
-				hard_nouns.add(int(row[i]))
+# The adjective declension column agreeing with a noun gender and number
+def adj_gender(gender, number):
+	name = genders[gender]
+	if name == 'masculine_personal' or name == 'masculine_animal':
+		if number == SINGULAR:
+			return 'masculine_animate'
+	if name == 'masculine_personal' and number == PLURAL:
+		return 'viril_plural'
+	if ((name == 'masculine_animal' or name == 'masculine_inanimate'
+		or name == 'feminine' or name == 'neuter')
+		and number == PLURAL):
+		return 'nonviril_plural'
+	return name
+
+# None for the genders taking no adjectives
+adj_genders = [[adj_column_codes.get(adj_gender(g, n)) for n in range(0, len(numbers))]
+	for g in range(0, len(genders))]
+
+def make_noun(word):
+	decl = [None] * len(cases)
+	for row in word['decl']:
+		decl[case_codes[row[0]]] = tuple(sys.intern(form) for form in row[1:])
+	return Noun(word['id'], gender_codes[word['gender']], word['def'],
+		tuple(decl), word['irregular'], word['no_prep'], word['only_prep'])
+
+def make_adj(adj):
+	decl = []
+	for name in adj_columns:
+		forms = adj['decl'][name]
+		decl.append(tuple(sys.intern(forms[case]) if case in forms else None
+			for case in cases))
+	return Adjective(adj['id'], adj['def'], tuple(decl))
+
+# Walker's alias method: after an O(n) setup, each weighted draw takes
+# one uniform index and one biased coin flip.
+def build_alias(weights):
+	n = len(weights)
+	total = sum(weights)
+	prob = [0.0] * n
+	alias = list(range(0, n))
+	scaled = [w * n / total for w in weights]
+	small = [i for i in range(0, n) if scaled[i] < 1]
+	large = [i for i in range(0, n) if scaled[i] >= 1]
+	while small and large:
+		s = small.pop()
+		l = large.pop()
+		prob[s] = scaled[s]
+		alias[s] = l
+		scaled[l] = scaled[l] + scaled[s] - 1
+		if scaled[l] < 1:
+			small.append(l)
 		else:
-			assert False, 'invalid row in hard set'
+			large.append(l)
+	for i in small + large:
+		prob[i] = 1.0
+	return prob, alias
 
-def add_adj(adj):
-	if args.nounhardonly:
-		if adj['id'] in hard_adjs:
-			adjs.append(adj)
-	else:
-		adjs.append(adj)
-		if adj['id'] in hard_adjs:
-			adjs.append(adj)
-			adjs.append(adj)
-			adjs.append(adj)
-def add_noun(noun):
-	if args.adjhardonly:
-		if noun['id'] in hard_nouns:
-			nouns.append(noun)
-	else:
-		nouns.append(noun)
-		if noun['id'] in hard_nouns:
-			nouns.append(noun)
-			nouns.append(noun)
-			nouns.append(noun)
-
-if args.adjs:
-	with open(args.adjdb_path, newline='') as csvfile:
+def alias_draw(table):
+	prob, alias = table
+	i = random.randrange(len(prob))
+	if random.random() < prob[i]:
+		return i
+	return alias[i]
+
+def read_adjs(path):
+	result = []
+	with open(path, newline='') as csvfile:
 		datareader = csv.reader(csvfile, delimiter='\t', quotechar='|')
 		hasword = False
 		adj = {}
 		for row in datareader:
 			if len(row) == 0:
 				if hasword:
-					add_adj(adj)
+					result.append(make_adj(adj))
 				hasword = False
 				adj = {}
 			elif not hasword:
@@ -158,10 +223,12 @@ if args.adjs:
 				else:
 					adj['decl']['nonviril_plural'][case] = row[i]
 		if hasword:
-			add_adj(adj)
+			result.append(make_adj(adj))
+	return result
 
-if args.preps:
-	with open(args.prepdb_path, newline='') as csvfile:
+def read_preps(path):
+	result = {}
+	with open(path, newline='') as csvfile:
 		datareader = csv.reader(csvfile, delimiter='\t', quotechar='|')
 		for row in datareader:
 			if (len(row) == 0 or row[0].startswith('#')):
@@ -176,37 +243,55 @@ if args.preps:
 			if len(row) > 4 and row[4] != '':
 				item['number'] = row[4]
 			if 'number' in item:
-				if not (case + '_' + item['number']) in preps:
-					preps[case + '_' + item['number']] = []
-				preps[case + '_' + item['number']].append(item)
+				if not (case + '_' + item['number']) in result:
+					result[case + '_' + item['number']] = []
+				result[case + '_' + item['number']].append(item)
 			else:
-				if not (case + '_singular') in preps:
-					preps[case + '_singular'] = []
-				preps[case + '_singular'].append(item)
-				if not (case + '_plural') in preps:
-					preps[case + '_plural'] = []
-				preps[case + '_plural'].append(item)
-
-with open(args.path, newline='') as csvfile:
-	datareader = csv.reader(csvfile, delimiter='\t', quotechar='|')
+				if not (case + '_singular') in result:
+					result[case + '_singular'] = []
+				result[case + '_singular'].append(item)
+				if not (case + '_plural') in result:
+					result[case + '_plural'] = []
+				result[case + '_plural'].append(item)
+	return result
+
+# Completes a noun with the 'gen' flag: the missing rows are generated
+# from the nominative, see decline.py
+def generate_rows(word):
+	rows = {row[0]: row for row in word['decl']}
+	nominative = rows['nominative']
+	forms = decline.decline(nominative[1], word['gender'])
+	assert forms is not None, 'no declension rules for ' + nominative[1]
+	word['decl'] = [rows.get(case, [case] + forms[case][:len(nominative) - 1])
+		for case in cases]
+
+# Parses nouns from the lines of pldb.csv, stopping at the first noun
+# with an id of at least endid, unless endid is 0.
+def parse_nouns(lines, endid):
+	result = []
+	datareader = csv.reader(lines, delimiter='\t', quotechar='|')
 	hasword = False
+	generated = False
 	word = {}
 	for row in datareader:
 		if len(row) == 0:
-			if (hasword and word['id'] >= args.startid):
-				add_noun(word)
+			if hasword:
+				if generated:
+					generate_rows(word)
+				result.append(make_noun(word))
 			word = {}
 			hasword = False
 		elif not hasword:
 			if row[0].startswith('#'):
 				continue
 			word['id'] = int(row[0])
-			if args.endid != 0 and word['id'] >= args.endid:
-				break
+			if endid != 0 and word['id'] >= endid:
+				return result
 			assert len(row) == 3 or len(row) == 4
 			word['irregular'] = False
 			word['no_prep'] = False
 			word['only_prep'] = False
+			generated = False
 			if len(row) == 4:
 				if "irr" in row[3]:
 					word['irregular'] = True
@@ -214,6 +299,8 @@ with open(args.path, newline='') as csvfile:
 					word['no_prep'] = True
 				if "only_prep" in row[3]:
 					word['only_prep'] = True
+				if "gen" in row[3]:
+					generated = True
 			if row[1] == 'f':
 				word['gender'] = 'feminine'
 			elif row[1] == 'n':
@@ -254,141 +341,571 @@ with open(args.path, newline='') as csvfile:
 				assert (len(row) == 3 or len(row) == 2)
 			word['decl'].append(row)
 	if hasword:
-		if word['id'] >= args.startid:
-			add_noun(word)
+		if generated:
+			generate_rows(word)
+		result.append(make_noun(word))
+	return result
+
+def read_nouns(path):
+	with open(path, newline='') as csvfile:
+		return parse_nouns(csvfile, 0)
+
+# Maps the noun ids in pldb.csv to the byte offsets of their first lines.
+# Returns None if the ids are not in ascending order.
+def build_noun_index(path):
+	ids = array('l')
+	offsets = array('q')
+	with open(path, 'rb') as f:
+		offset = 0
+		hasword = False
+		for line in f:
+			if line.strip(b'\r\n') == b'':
+				hasword = False
+			elif not hasword and not line.startswith(b'#'):
+				id = int(line.split(b'\t')[0])
+				if len(ids) > 0 and id < ids[-1]:
+					return None
+				ids.append(id)
+				offsets.append(offset)
+				hasword = True
+			offset = offset + len(line)
+	return ids, offsets
+
+def read_noun_range(path, index, startid, endid):
+	ids, offsets = index
+	i = bisect.bisect_left(ids, startid)
+	if i == len(ids):
+		return []
+	with open(path, 'rb') as f:
+		f.seek(offsets[i])
+		with io.TextIOWrapper(f, newline='') as csvfile:
+			return parse_nouns(csvfile, endid)
+
+# The parsed databases are cached next to the CSV files, the cache is
+# valid as long as the size and modification time of the CSV match, and
+# the modification time of decline.py, as the nouns with the 'gen' flag
+# depend on its rules.
+# Bump cache_version whenever the layout of the parsed records changes.
+cache_version = 2
 
-random.shuffle(nouns)
+def load_cached(path, reader, suffix='.cache'):
+	st = os.stat(path)
+	key = (cache_version, st.st_size, st.st_mtime_ns,
+		os.stat(decline.__file__).st_mtime_ns)
+	cache_path = path + suffix
+	# The collector would scan the whole object graph repeatedly while
+	# unpickling, making the cache slower than parsing the CSV.
+	gc_enabled = gc.isenabled()
+	gc.disable()
+	# The key is a record of its own, read before the data, so the data of
+	# another layout is never unpickled. Any failure to unpickle means a
+	# stale cache as well.
+	try:
+		with open(cache_path, 'rb') as f:
+			if pickle.load(f) == key:
+				return pickle.load(f)
+	except Exception:
+		pass
+	finally:
+		if gc_enabled:
+			gc.enable()
+	data = reader(path)
+	try:
+		tmp_path = cache_path + '.tmp'
+		with open(tmp_path, 'wb') as f:
+			pickle.dump(key, f, protocol=pickle.HIGHEST_PROTOCOL)
+			pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+		os.replace(tmp_path, cache_path)
+	except OSError:
+		pass
+	return data
 
-def ask(case, number, noun_id, answer, ns, prev, gender, no_prep, no_adj):
-	global hard_change
+def load_db(path, reader, nocache):
+	if nocache:
+		return reader(path)
+	return load_cached(path, reader)
+
+def load_nouns(args):
+	if args.nocache or (args.startid == 0 and args.endid == 0):
+		return load_db(args.path, read_nouns, args.nocache)
+	index = load_cached(args.path, build_noun_index, '.idx')
+	if index is None:
+		return read_nouns(args.path)
+	return read_noun_range(args.path, index, args.startid, args.endid)
+
+# The reverse index of the forms maps each form to its analyses, the
+# whole databases are indexed regardless of the id range of the drill.
+def index_form(index, form, analysis):
+	if form not in index:
+		index[form] = []
+	index[form].append(analysis)
+
+def read_noun_forms(path):
+	index = {}
+	for noun in read_nouns(path):
+		first = SINGULAR
+		if noun.gender in plural_only_genders:
+			first = PLURAL
+		for case in range(0, len(cases)):
+			forms = noun.decl[case]
+			if forms is None:
+				continue
+			index_form(index, forms[0], Analysis('noun', noun.id, case, first,
+				noun.gender))
+			if len(forms) == 2:
+				index_form(index, forms[1], Analysis('noun', noun.id, case, PLURAL,
+					noun.gender))
+	return index
+
+def read_adj_forms(path):
+	index = {}
+	for adj in read_adjs(path):
+		for gender in range(0, len(genders)):
+			for number in range(0, len(numbers)):
+				column = adj_genders[gender][number]
+				if column is None:
+					continue
+				for case in range(0, len(cases)):
+					form = adj.decl[column][case]
+					if form is not None:
+						index_form(index, form, Analysis('adj', adj.id, case, number,
+							gender))
+	return index
+
+def load_forms(args):
+	if args.nocache:
+		return [read_noun_forms(args.path), read_adj_forms(args.adjdb_path)]
+	return [load_cached(args.path, read_noun_forms, '.forms'),
+		load_cached(args.adjdb_path, read_adj_forms, '.forms')]
+
+def lookup_form(indexes, form):
+	return [analysis for index in indexes for analysis in index.get(form, [])]
+
+# The case and number names of a noun, optionally preceded by adjectives,
+# e.g. {'genitive singular', 'nominative plural'}
+def phrase_analyses(indexes, phrase):
+	words = phrase.split()
+	result = {(a.case, a.number, a.gender) for a in lookup_form(indexes, words[-1])
+		if a.pos == 'noun'}
+	for word in words[:-1]:
+		result &= {(a.case, a.number, a.gender) for a in lookup_form(indexes, word)
+			if a.pos == 'adj'}
+	return {cases[case] + ' ' + numbers[number] for case, number, gender in result}
+
+# Besides the hard sets, the hard file keeps the total response time in
+# milliseconds and the number of answers for each noun and adjective,
+# as noun_time and adj_time rows.
+def new_hards():
+	return {'nouns': set(), 'adjs': set(), 'noun_times': {}, 'adj_times': {},
+		'changed': False}
+
+def read_hards(path):
+	hards = new_hards()
+	with open(path, newline='') as csvfile:
+		datareader = csv.reader(csvfile, delimiter='\t', quotechar='|')
+		for row in datareader:
+			if (len(row) == 0 or row[0].startswith('#')):
+				continue
+			if row[0] == 'adj':
+				for i in range(1, len(row)):
+					hards['adjs'].add(int(row[i]))
+			elif row[0] == 'noun':
+				for i in range(1, len(row)):
+					hards['nouns'].add(int(row[i]))
+			elif row[0] == 'noun_time' or row[0] == 'adj_time':
+				assert len(row) == 4
+				times = hards[row[0] + 's']
+				times[int(row[1])] = [int(row[2]), int(row[3])]
+			else:
+				assert False, 'invalid row in hard set'
+	return hards
+
+def save_hards(path, hards, print=print):
+	if not hards['changed']:
+		return
+	tmp_path = path + '.tmp'
+	with metrics.timer('dp.save_hards'):
+		with open(tmp_path, 'w', newline='') as csvfile:
+			writer = csv.writer(csvfile, delimiter='\t', quotechar='|')
+			if len(hards['nouns']) > 0:
+				writer.writerow(['noun'] + list(hards['nouns']))
+			if len(hards['adjs']) > 0:
+				writer.writerow(['adj'] + list(hards['adjs']))
+			for name in ('noun_time', 'adj_time'):
+				for id, (total, count) in sorted(hards[name + 's'].items()):
+					writer.writerow([name, id, total, count])
+		os.replace(tmp_path, path)
+	print('overwritten file: ' + path)
+
+def record_time(hards, question, start):
+	ms = int((time.monotonic() - start) * 1000)
+	items = [('noun_times', question.noun_id)]
+	if question.adj_id != -1:
+		items.append(('adj_times', question.adj_id))
+	for name, id in items:
+		total, count = hards[name].get(id, (0, 0))
+		hards[name][id] = [total + ms, count + 1]
+	hards['changed'] = True
+
+# Items answered slower than the average weigh proportionally more, the
+# factors are at least 1
+def effort_factors(times):
+	total = sum(t[0] for t in times.values())
+	count = sum(t[1] for t in times.values())
+	if total == 0:
+		return {}
+	mean = total / count
+	return {id: max(1, t[0] / t[1] / mean) for id, t in times.items()}
+
+# Returns the items to draw from, and their weights. The effort factor
+# raises a weight up to the hard weight, but never lowers one.
+def weigh(items, hard, hard_only, hard_weight, times):
+	selected = []
+	weights = []
+	efforts = effort_factors(times)
+	for item in items:
+		if hard_only and item.id not in hard:
+			continue
+		weight = 1
+		if item.id in hard and not hard_only:
+			weight = hard_weight
+		selected.append(item)
+		weights.append(max(weight,
+			min(max(1, hard_weight), weight * efforts.get(item.id, 1))))
+	return selected, weights
+
+# Lists of prepositions indexed by case * len(numbers) + number
+def index_preps(preps):
+	result = [None] * (len(cases) * len(numbers))
+	for key, items in preps.items():
+		case, number = key.rsplit('_', 1)
+		result[case_codes[case] * len(numbers) + number_codes[number]] = items
+	return result
+
+# The command line filters turned into sets of codes
+def compile_plan(args):
+	plan = {}
+	if args.case == 'all':
+		plan['cases'] = frozenset(c for c in range(0, len(cases))
+				if args.full7 or c != VOCATIVE)
+	else:
+		plan['cases'] = frozenset([case_codes.get(args.case, -1)])
+	if args.gender == 'all':
+		plan['genders'] = frozenset(range(0, len(genders)))
+	elif args.gender == 'masculine':
+		plan['genders'] = masculine_genders
+	else:
+		plan['genders'] = frozenset([gender_codes.get(args.gender, -1)])
+	plan['singular'] = args.number != 'plural'
+	plan['plural'] = args.number != 'singular'
+	plan['skip_plurale'] = args.number == 'singular'
+	plan['need_plural'] = args.number == 'plural'
+	if args.full6 or args.full7:
+		plan['plural_cases'] = frozenset(range(0, len(cases)))
+	else:
+		plan['plural_cases'] = common_plural_cases
+	plan['adjs'] = args.adjs
+	plan['preps'] = args.preps
+	plan['shuffle_cases'] = args.rcases
+	plan['tolerance'] = args.tolerance
+	return plan
+
+# The databases are read with load(path, reader) if given, e.g. to take
+# them from memory in a server.
+def load_drill(args, hards, load=None):
+	if load is None:
+		load = lambda path, reader: load_db(path, reader, args.nocache)
+		all_nouns = load_nouns(args)
+	else:
+		all_nouns = load(args.path, read_nouns)
+	drill = {'plan': compile_plan(args), 'adjs': [], 'adj_table': None,
+		'preps': index_preps({})}
+	if args.adjs:
+		drill['adjs'], weights = weigh(load(args.adjdb_path, read_adjs),
+			hards['adjs'], args.nounhardonly, args.hard_weight, hards['adj_times'])
+		if len(drill['adjs']) > 0:
+			drill['adj_table'] = build_alias(weights)
+	if args.preps:
+		drill['preps'] = index_preps(load(args.prepdb_path, read_preps))
+	nouns = [word for word in all_nouns if word.id >= args.startid
+		and (args.endid == 0 or word.id < args.endid)]
+	drill['nouns'], drill['noun_weights'] = weigh(nouns, hards['nouns'],
+		args.adjhardonly, args.hard_weight, hards['noun_times'])
+	return drill
+
+# The qid of a question is 'noun_id:case:number:adj_id:prep_index', with
+# -1 for a missing adjective or preposition.
+Question = namedtuple('Question', 'prompt answer form hint noun_id adj_id qid')
+
+def compose_question(noun, gender, case, number, form, hint, adj, prep,
+		prep_index=-1):
+	answer = form
 	prompt_adj = ''
 	prompt_prep = ''
 	prompt_postp = ''
-	prompt_case = ' ' + case
+	prompt_case = ' ' + cases[case]
 	adj_id = -1
-	if (args.adjs and case != 'vocative' and gender != 'pronoun_plural'
-		and gender != 'pronoun' and gender != 'numeral'
-		and not no_adj
-		and gender != 'numeral_plural'):
-		adj = random.choice(adjs)
-		adj_id = adj['id']
-		adjg = gender
-		if ((gender == 'masculine_personal' or gender == 'masculine_animal')
-			and number == 'singular'):
-			adjg = 'masculine_animate'
-		if gender == 'masculine_personal' and number == 'plural':
-			adjg = 'viril_plural'
-		if ((gender == 'masculine_animal' or gender == 'masculine_inanimate'
-			or gender == 'feminine' or gender == 'neuter')
-			and number == 'plural'):
-			adjg = 'nonviril_plural'
-		answer = adj['decl'][adjg][case] + ' ' + answer
-		prompt_adj = ' ' + adj['def']
-		
-	if (args.preps and (case + '_' + number) in preps
-		and not no_prep
-		and gender != 'numeral' and gender != 'numeral_plural'):
+	if adj is not None:
+		adj_id = adj.id
+		answer = adj.decl[adj_genders[gender][number]][case] + ' ' + answer
+		prompt_adj = ' ' + adj.definition
+	if prep is not None:
 		prompt_case = ''
-		prep = random.choice(preps[case + '_' + number])
 		if 'question_prep' in prep:
 			prompt_prep = ' ' + prep['question_prep']
 		if 'question_postp' in prep:
 			prompt_postp = '   ' + prep['question_postp']
 		answer = prep['preposition'] + ' ' + answer
 		# TODO: allow ze, we, pode...
-	prompt = prompt_prep + prompt_adj + prompt_case + ' ' + number + prompt_postp + ' :'
+	prompt = (prompt_prep + prompt_adj + prompt_case + ' ' + numbers[number]
+		+ prompt_postp + ' :')
+	qid = '{}:{}:{}:{}:{}'.format(noun.id, case, number, adj_id, prep_index)
+	return Question(prompt.strip().rjust(50) + ' ', answer, form, hint,
+		noun.id, adj_id, qid)
+
+def accept_noun(noun, plan):
+	if plan['skip_plurale'] and noun.gender in plurale_genders:
+		return False
+	if plan['need_plural'] and len(noun.decl[NOMINATIVE]) < 2:
+		return False
+	if noun.gender not in plan['genders']:
+		return False
+	return plan['preps'] or not noun.only_prep
+
+def noun_questions(noun, drill):
+	plan = drill['plan']
+	gender = noun.gender
+	hint = noun.decl[NOMINATIVE][0]
+	present = [case for case in range(0, len(cases)) if noun.decl[case] is not None]
+	if plan['shuffle_cases']:
+		present = random.sample(present, len(present))
+	use_adj = (drill['adj_table'] is not None and gender not in no_adj_genders
+		and not noun.only_prep)
+	use_prep = plan['preps'] and not noun.no_prep and gender not in no_prep_genders
+	for case in present:
+		if case not in plan['cases']:
+			continue
+		forms = noun.decl[case]
+		asked = []
+		if plan['singular'] and gender not in plural_only_genders:
+			asked.append((SINGULAR, forms[0]))
+		if (plan['plural'] and gender not in singular_only_genders
+			and (noun.irregular or case in plan['plural_cases'])):
+			if gender in plural_only_genders:
+				asked.append((PLURAL, forms[0]))
+			elif len(forms) == 2:
+				asked.append((PLURAL, forms[1]))
+		for number, form in asked:
+			with metrics.timer('dp.question'):
+				adj = None
+				if use_adj and case != VOCATIVE:
+					adj = drill['adjs'][alias_draw(drill['adj_table'])]
+				prep = None
+				prep_index = -1
+				if use_prep:
+					items = drill['preps'][case * len(numbers) + number]
+					if items is not None:
+						prep_index = random.randrange(len(items))
+						prep = items[prep_index]
+				question = compose_question(noun, gender, case, number, form,
+					hint, adj, prep, prep_index)
+			yield question
+
+# A weighted shuffle: each noun is drawn ceil(weight) times, so a hard
+# one comes up -H times in a run, and the heavier ones are more likely to
+# come early. Sorting by random() raised
+# to 1 / weight draws in proportion to the weights at every step. Nouns
+# of weight 0 are left out.
+def draw_nouns(drill):
+	weights = drill['noun_weights']
+	keys = [(random.random() ** (1 / weights[i]), i)
+		for i in range(0, len(weights)) if weights[i] > 0
+		for _ in range(0, math.ceil(weights[i]))]
+	keys.sort(reverse=True)
+	for _, i in keys:
+		yield drill['nouns'][i]
+
+# All the questions of a drill, without any terminal I/O
+def questions(drill):
+	for noun in draw_nouns(drill):
+		if accept_noun(noun, drill['plan']):
+			yield from noun_questions(noun, drill)
 
-	prompt = prompt.strip().rjust(50) + ' '
+def noun_form(noun, gender, case, number):
+	forms = noun.decl[case]
+	if forms is None:
+		return None
+	if number == SINGULAR or gender in plural_only_genders:
+		return forms[0]
+	if len(forms) == 2:
+		return forms[1]
+	return None
 
-	resp = ' '.join(input(prompt).split()).strip()
+# Rebuilds the question of a qid, returns None for an invalid qid
+def question_of(qid, nouns, adjs, preps):
+	try:
+		noun_id, case, number, adj_id, prep_index = [int(x) for x in qid.split(':')]
+		if (case < 0 or case >= len(cases) or number < 0
+				or number >= len(numbers) or prep_index < -1):
+			return None
+		noun = nouns[noun_id]
+		form = noun_form(noun, noun.gender, case, number)
+		adj = None
+		if adj_id != -1:
+			adj = adjs[adj_id]
+		prep = None
+		if prep_index != -1:
+			prep = preps[case * len(numbers) + number][prep_index]
+		if form is None:
+			return None
+		return compose_question(noun, noun.gender, case, number, form,
+			noun.decl[NOMINATIVE][0], adj, prep, prep_index)
+	except (ValueError, KeyError, IndexError, TypeError):
+		return None
+
+def normalize_response(resp):
+	return ' '.join(resp.split()).strip()
+
+# Grades (qid, response) pairs, yields (qid, result, answer) tuples where
+# result is 'ok', 'near', 'wrong' or 'invalid'.
+def grade_batch(drill, records):
+	nouns = {noun.id: noun for noun in drill['nouns']}
+	adjs = {adj.id: adj for adj in drill['adjs']}
+	tolerance = drill['plan']['tolerance']
+	for qid, response in records:
+		question = question_of(qid, nouns, adjs, drill['preps'])
+		if question is None:
+			yield qid, 'invalid', ''
+		elif normalize_response(response) == question.answer:
+			yield qid, 'ok', question.answer
+		elif is_near_miss(question, response, tolerance):
+			yield qid, 'near', question.answer
+		else:
+			yield qid, 'wrong', question.answer
+
+def read_batch(path):
+	if path == '-':
+		f = sys.stdin
+	else:
+		f = open(path, newline='')
+	with f:
+		for line in f:
+			row = line.rstrip('\r\n').split('\t', 1)
+			if len(row) == 2:
+				yield row[0], row[1]
+
+def run_batch(args):
+	args.adjs = True
+	args.preps = True
+	drill = load_drill(args, new_hards())
+	counts = {'ok': 0, 'near': 0, 'wrong': 0, 'invalid': 0}
+	lines = []
+	for qid, result, answer in grade_batch(drill, read_batch(args.batch)):
+		counts[result] = counts[result] + 1
+		lines.append('{}\t{}\t{}\n'.format(qid, result, answer))
+		if len(lines) == 4096:
+			sys.stdout.write(''.join(lines))
+			lines = []
+	sys.stdout.write(''.join(lines))
+	print('ok: {} near: {} wrong: {} invalid: {}'.format(counts['ok'],
+		counts['near'], counts['wrong'], counts['invalid']), file=sys.stderr)
+
+def is_near_miss(question, response, tolerance):
+	if tolerance is None:
+		return False
+	key = match.answer_key(question.answer)
+	return match.grade(key, response, tolerance) != match.WRONG
+
+# Returns match.EXACT, or match.NEAR after a near miss, which is shown
+# the answer and accepted. The time it took is added to the hard file.
+def ask(question, prev, hards, input=input, print=print, tolerance=None):
+	start = time.monotonic()
+	resp = normalize_response(input(question.prompt))
 	if resp == 'x':
 		resp = prev
 	c = 0
-	while (resp != answer):
+	while (resp != question.answer):
 		if resp == '':
 			c += 1
 			if c == 1:
-				print('The word is ' + ns)
+				print('The word is ' + question.hint)
 			else:
-				print('It is "' + answer + '"')
+				print('It is "' + question.answer + '"')
 		elif resp == 'q':
 			print('q pressed!')
-			hard_nouns.add(noun_id)
-			hard_change = True
+			hards['nouns'].add(question.noun_id)
+			hards['changed'] = True
 		elif resp == 'w':
 			print('w pressed!')
-			hard_adjs.add(adj_id)
-			hard_change = True
+			hards['adjs'].add(question.adj_id)
+			hards['changed'] = True
 		elif resp == 'e':
 			print('e pressed!')
-			hard_nouns.add(noun_id)
-			hard_adjs.add(adj_id)
-			hard_change = True
-		resp = ' '.join(input(prompt).split()).strip()
+			hards['nouns'].add(question.noun_id)
+			hards['adjs'].add(question.adj_id)
+			hards['changed'] = True
+		elif is_near_miss(question, resp, tolerance):
+			print('Almost: "' + question.answer + '"')
+			record_time(hards, question, start)
+			return match.NEAR
+		resp = normalize_response(input(question.prompt))
+	record_time(hards, question, start)
+	return match.EXACT
 
-def save_hards():
-	if not hard_change:
+def run_drill(drill, hards, input=input, print=print):
+	print(list(hards['nouns']))
+	for noun in draw_nouns(drill):
+		if not accept_noun(noun, drill['plan']):
+			continue
+		print('')
+		print(noun.definition)
+		prev = ''
+		for question in noun_questions(noun, drill):
+			ask(question, prev, hards, input, print, drill['plan']['tolerance'])
+			prev = question.form
+
+# Shows the answer of a question, and asks for its case and number, any
+# analysis of the form found in the indexes is accepted.
+def identify(question, indexes, hards, input=input, print=print):
+	start = time.monotonic()
+	answers = phrase_analyses(indexes, question.answer)
+	prompt = question.answer.rjust(50) + ' : '
+	resp = normalize_response(input(prompt))
+	while resp not in answers:
+		if resp == '':
+			print('It is "' + '" or "'.join(sorted(answers)) + '"')
+		resp = normalize_response(input(prompt))
+	record_time(hards, question, start)
+	return match.EXACT
+
+# The questions are drawn as in run_drill, without prepositions, whose
+# forms are not indexed
+def run_identify(drill, indexes, hards, input=input, print=print):
+	for noun in draw_nouns(drill):
+		if not accept_noun(noun, drill['plan']):
+			continue
+		print('')
+		for question in noun_questions(noun, drill):
+			identify(question, indexes, hards, input, print)
+
+def main():
+	args = parser.parse_args()
+	metrics.enable(args.metrics)
+	if args.batch is not None:
+		run_batch(args)
 		return
-	with open(args.hard_path, 'w', newline='') as csvfile:
-		writer = csv.writer(csvfile, delimiter='\t', quotechar='|')
-		if len(hard_nouns) > 0:
-			writer.writerow(['noun'] + list(hard_nouns))
-		if len(hard_adjs) > 0:
-			writer.writerow(['adj'] + list(hard_adjs))
-	print('overwritten file: ' + args.hard_path)
-
-atexit.register(save_hards)
-
-print(list(hard_nouns))
-
-for picked in nouns:
-	if (args.number == 'singular' and (
-		picked['gender'] == 'viril_plural'
-		or picked['gender'] == 'nonviril_plural')):
-		continue
-	if (args.number == 'plural' and len(picked['decl'][0]) < 3):
-		continue
-	if (args.gender == 'masculine'
-		and not picked['gender'].startswith('masculine')):
-		continue
-	elif (args.gender != 'all'
-		and picked['gender'] != args.gender):
-		continue
-	elif picked['only_prep'] and not args.preps:
-		continue
-	print('')
-	print(picked['def'])
-	assert picked['decl'][0][0] == 'nominative'
-	ns = picked['decl'][0][1]
-	prev = ''
-	if args.rcases:
-		random.shuffle(picked['decl'])
-	for d in picked['decl']:
-		if args.case == 'all' and ((not args.full7) and d[0] == 'vocative'):
-			continue;
-		if args.case != 'all' and d[0] != args.case:
-			continue;
-		if (args.number != 'plural'
-			and picked['gender'] != 'pronoun_plural'
-			and picked['gender'] != 'numeral_plural'
-			and picked['gender'] != 'viril_plural'
-			and picked['gender'] != 'nonviril_plural'):
-			ask(d[0], 'singular', picked['id'], d[1], ns, prev, picked['gender'], picked['no_prep'], picked['only_prep'])
-			prev = d[1]
-		if (args.number != 'singular'
-			and picked['gender'] != 'pronoun'
-			and picked['gender'] != 'numeral'
-			and (args.full6 or args.full7 or picked['irregular'] or
-				d[0] == 'nominative' or d[0] == 'genitive' or
-				d[0] == 'accusative'
-			)):
-			answer = d[1]
-			if (picked['gender'] != 'viril_plural'
-				and picked['gender'] != 'pronoun_plural'
-				and picked['gender'] != 'numeral_plural'
-				and picked['gender'] != 'nonviril_plural'):
-				if (len(d) == 2):
-					continue
-				answer = d[2]
-			ask(d[0], 'plural', picked['id'], answer, ns, prev, picked['gender'], picked['no_prep'], picked['only_prep'])
-			prev = answer
+	if args.identify:
+		args.preps = False
+	with metrics.timer('dp.load'):
+		hards = read_hards(args.hard_path)
+		drill = load_drill(args, hards)
+		if args.identify:
+			indexes = load_forms(args)
+	atexit.register(save_hards, args.hard_path, hards)
+	if args.identify:
+		run_identify(drill, indexes, hards)
+	else:
+		run_drill(drill, hards)
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,70 @@
+#
+# Copyright 2026 Gabor Buella
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# 1. Redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# “AS IS” AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED
+# TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+# PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE,
+# EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+# The declension codes and the records of the parsed databases shared by
+# dp.py and the tools around it. The records live here rather than in
+# dp.py, so the caches name the same classes whether dp.py runs as a
+# script or is imported.
+
+from collections import namedtuple
+
+# Declension codes, the names are the ones used in the CSV files
+cases = ('nominative', 'genitive', 'dative', 'accusative', 'instrumental',
+	'locative', 'vocative')
+numbers = ('singular', 'plural')
+genders = ('masculine_personal', 'masculine_animal', 'masculine_inanimate',
+	'feminine', 'neuter', 'viril_plural', 'nonviril_plural',
+	'pronoun', 'pronoun_plural', 'numeral', 'numeral_plural')
+
+case_codes = {name: code for code, name in enumerate(cases)}
+number_codes = {name: code for code, name in enumerate(numbers)}
+gender_codes = {name: code for code, name in enumerate(genders)}
+
+NOMINATIVE = case_codes['nominative']
+VOCATIVE = case_codes['vocative']
+SINGULAR = number_codes['singular']
+PLURAL = number_codes['plural']
+
+# The columns of an adjective declension
+adj_columns = ('viril_plural', 'nonviril_plural', 'masculine_animate',
+	'masculine_inanimate', 'feminine', 'neuter')
+adj_column_codes = {name: code for code, name in enumerate(adj_columns)}
+
+# The parsed nouns and adjectives, with the forms in tuples indexed by
+# the codes above. The forms are interned, as the same ones repeat across
+# cases and words.
+# Noun.decl holds the singular and plural forms of each case, only one
+# form for the singular-only and plural-only genders, or None for a
+# missing case.
+Noun = namedtuple('Noun', 'id gender definition decl irregular no_prep only_prep')
+# Adjective.decl holds a tuple of forms for each column, None for the
+# vocative.
+Adjective = namedtuple('Adjective', 'id definition decl')
+
+# An analysis of a form in the reverse index of dp.py. An adjective form
+# has an analysis for every noun gender it agrees with.
+Analysis = namedtuple('Analysis', 'pos id case number gender')
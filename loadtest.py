@@ -0,0 +1,193 @@
+#
+# Copyright 2026 Gabor Buella
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# 1. Redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# “AS IS” AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED
+# TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+# PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE,
+# EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+# Drives write.review_loop and dp.ask with scripted learners in place of
+# the terminal, and reports the throughput and the latency seen by them:
+#
+#   python loadtest.py write -n 1000 -j 8 -a 0.9
+#   python loadtest.py dp -n 100 -q -w
+
+import os
+import argparse
+import json
+import random
+import shutil
+import tempfile
+import time
+from multiprocessing import Pool
+import dp
+import write
+import bench
+
+class Learner:
+	def __init__(self, accuracy, delay, answers, seed):
+		self.accuracy = accuracy
+		self.delay = delay
+		self.answers = answers
+		self.random = random.Random(seed)
+		self.answer = ''
+		self.targets = {}
+		self.count = 0
+		self.correct = 0
+		self.answered_at = None
+		self.latencies = []
+
+	def print(self, text=''):
+		if text in self.targets:
+			self.answer = self.targets[text]
+
+	def input(self, prompt=''):
+		now = time.perf_counter()
+		if self.answered_at is not None:
+			self.latencies.append(now - self.answered_at)
+		if self.count == self.answers:
+			raise EOFError
+		if self.delay > 0:
+			time.sleep(self.delay)
+		self.count = self.count + 1
+		if self.random.random() < self.accuracy:
+			self.correct = self.correct + 1
+			resp = self.answer
+		else:
+			resp = '?'
+		self.answered_at = time.perf_counter()
+		return resp
+
+def write_session(task):
+	path, args, seed = task
+	learner = Learner(args.accuracy, args.delay, args.answers, seed)
+	wargs = argparse.Namespace(path=path, start=0, end=0,
+		target_count=args.target_count)
+	id, terms = write.read_terms(wargs)
+	learner.targets = dict(zip(terms['def'], terms['target']))
+	logpath = path + '.log'
+	write.readlog_checkpointed(logpath, terms, id)
+	scheduler = write.schedulers[args.scheduler](terms, args.target_count)
+	log_size = 0
+	if os.path.isfile(logpath):
+		log_size = os.path.getsize(logpath)
+	start = time.perf_counter()
+	try:
+		with write.LogWriter(logpath, False, args.flush_every) as log:
+			write.review_loop(scheduler, log, id, learner.input, learner.print)
+	except EOFError:
+		pass
+	return learner, time.perf_counter() - start, os.path.getsize(logpath) - log_size
+
+drill = None
+
+def dp_session(task):
+	_, args, seed = task
+	global drill
+	if drill is None:
+		dargs = dp.parser.parse_args(args.dp_args + ['-E', os.devnull])
+		drill = dp.load_drill(dargs, dp.read_hards(os.devnull))
+	random.seed(seed)
+	learner = Learner(args.accuracy, args.delay, args.answers, seed)
+	hards = dp.new_hards()
+	prev = ''
+	start = time.perf_counter()
+	try:
+		for question in dp.questions(drill):
+			learner.answer = question.answer
+			dp.ask(question, prev, hards, learner.input, learner.print)
+			prev = question.form
+	except EOFError:
+		pass
+	return learner, time.perf_counter() - start, 0
+
+def run_session(task):
+	if task[0] is None:
+		learner, elapsed, log_bytes = dp_session(task)
+	else:
+		learner, elapsed, log_bytes = write_session(task)
+	return {'answers': learner.count, 'correct': learner.correct,
+		'seconds': elapsed, 'log_bytes': log_bytes,
+		'latencies': learner.latencies}
+
+def percentile(values, p):
+	if len(values) == 0:
+		return 0
+	return values[min(len(values) - 1, int(len(values) * p))]
+
+def summarize(results, elapsed):
+	answers = sum(r['answers'] for r in results)
+	latencies = sorted(l for r in results for l in r['latencies'])
+	return {'sessions': len(results), 'answers': answers,
+		'correct': sum(r['correct'] for r in results),
+		'seconds': elapsed,
+		'answers_per_second': answers / elapsed,
+		'log_bytes_per_second': sum(r['log_bytes'] for r in results) / elapsed,
+		'latency_p50': percentile(latencies, 0.5),
+		'latency_p99': percentile(latencies, 0.99),
+		'latency_max': percentile(latencies, 1)}
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description='simulated learners.')
+	parser.add_argument('tool', choices=['write', 'dp'])
+	parser.add_argument('-p', help='deck to copy for each write session, a synthetic one by default',
+			dest='path')
+	parser.add_argument('-d', help='size of the synthetic deck', type=int,
+			default=10000, dest='deck_size')
+	parser.add_argument('-t', help='target write score', type=int,
+			default=1000, dest='target_count')
+	parser.add_argument('-n', help='number of sessions', type=int, default=100,
+			dest='sessions')
+	parser.add_argument('-k', help='answers per session', type=int, default=200,
+			dest='answers')
+	parser.add_argument('-j', help='parallel processes', type=int, default=1,
+			dest='jobs')
+	parser.add_argument('-a', help='accuracy of the learners', type=float,
+			default=0.9, dest='accuracy')
+	parser.add_argument('-f', help='write the log after this many answers',
+			type=int, default=1, dest='flush_every')
+	parser.add_argument('-y', help='typing delay in seconds', type=float,
+			default=0, dest='delay')
+	parser.add_argument('-S', help='write.py scheduler',
+			choices=sorted(write.schedulers), default='score', dest='scheduler')
+	args, args.dp_args = parser.parse_known_args()
+	with tempfile.TemporaryDirectory() as dir:
+		tasks = []
+		for i in range(0, args.sessions):
+			path = None
+			if args.tool == 'write':
+				path = os.path.join(dir, 'deck{}.csv'.format(i))
+				if args.path is not None:
+					shutil.copyfile(args.path, path)
+				elif i == 0:
+					bench.gen_deck(path, args.deck_size, 1)
+				else:
+					shutil.copyfile(tasks[0][0], path)
+			tasks.append((path, args, i))
+		start = time.perf_counter()
+		if args.jobs == 1:
+			results = [run_session(task) for task in tasks]
+		else:
+			with Pool(args.jobs) as pool:
+				results = pool.map(run_session, tasks)
+		elapsed = time.perf_counter() - start
+	print(json.dumps(summarize(results, elapsed)))
@@ -0,0 +1,205 @@
+#
+# Copyright 2026 Gabor Buella
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# 1. Redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# “AS IS” AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED
+# TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+# PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE,
+# EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+# Summarizes the logs of write.py decks. A log is read in chunks, see
+# write.log_chunks, and folded into counters for each term, so the memory
+# taken depends on the size of the deck, not on the length of its log:
+#
+#   python logstats.py -A decks -o summary.tsv
+#
+# For each deck a deck line is written with the number of terms, the
+# terms answered in the log, the answers, the share of them right the
+# first time, the days of practice, the mean days between two reviews of
+# a term, the score earned per day of practice, the terms at the target
+# score, the terms close below it, and the mean response time in ms where
+# it was logged. With -v, a term line follows for each answered term.
+
+import sys
+import argparse
+import csv
+from multiprocessing import Pool
+import write
+
+parser = argparse.ArgumentParser(description='Summarize write.py logs.')
+parser.add_argument('-p', help='CSV file path', default='pl_vocab_write.csv',
+		dest='path')
+parser.add_argument('-A', help='every deck with a log in a directory, or listed in a file',
+		dest='decks')
+parser.add_argument('-t', help='target write score', default=1000, type=int,
+		dest='target_count')
+parser.add_argument('-c', help='how close below the target a term is reported, a tenth of it by default',
+		type=int, dest='margin')
+parser.add_argument('-o', help='output file', default='-', dest='output')
+parser.add_argument('-v', help='write a line for each answered term',
+		action='store_true', dest='terms')
+
+# The counters of a term: answers, first time right answers, score
+# earned, first and last day answered, days answered, the total response
+# time and the number of answers it was logged for
+ANSWERS, FIRST, DELTA, FIRST_DAY, LAST_DAY, DAYS, MS, TIMED = range(0, 8)
+
+# Adds the records of a chunk to the counters held under the slots of
+# the terms, as told in write.log_slot, and the days to the set of days
+def fold_chunk(stats, days, chunk, id):
+	for keyed, term, delta, day, latency in zip(*chunk):
+		if term == -1:
+			if delta != id:
+				raise Exception('log does not match')
+			continue
+		slot = write.log_slot(keyed, term, None, None)
+		counters = stats.get(slot)
+		if counters is None:
+			counters = [0, 0, 0, day, day, 1, 0, 0]
+			stats[slot] = counters
+		elif counters[LAST_DAY] != day:
+			counters[LAST_DAY] = day
+			counters[DAYS] = counters[DAYS] + 1
+		counters[ANSWERS] = counters[ANSWERS] + 1
+		if delta > 0:
+			counters[FIRST] = counters[FIRST] + 1
+			counters[DELTA] = counters[DELTA] + delta
+		if latency > 0:
+			counters[MS] = counters[MS] + latency
+			counters[TIMED] = counters[TIMED] + 1
+		days.add(day)
+
+# The counters of a term logged both by position and by key
+def combine(a, b):
+	if a is None:
+		return b
+	if b is None:
+		return a
+	result = [x + y for x, y in zip(a, b)]
+	result[FIRST_DAY] = min(a[FIRST_DAY], b[FIRST_DAY])
+	result[LAST_DAY] = max(a[LAST_DAY], b[LAST_DAY])
+	return result
+
+def ratio(a, b):
+	if b == 0:
+		return ''
+	return '{:.2f}'.format(a / b)
+
+# Returns the rows about a deck, the deck line first
+def deck_stats(args, path):
+	id = write.read_deck_id(path)
+	stats = {}
+	days = set()
+	for _, chunk in write.log_chunks(path + '.log'):
+		fold_chunk(stats, days, chunk, id)
+	margin = args.margin
+	if margin is None:
+		margin = args.target_count // 10
+	totals = [0] * 8
+	count = 0
+	answered = 0
+	matched = 0
+	mastered = 0
+	close = 0
+	span = 0
+	term_rows = []
+	with open(path, newline='') as csvfile:
+		datareader = csv.reader(csvfile, delimiter='\t', quotechar='|')
+		first = True
+		for row in datareader:
+			if len(row) == 0 or row[0].startswith('#'):
+				continue
+			if first:
+				first = False
+				continue
+			assert len(row) == 2 or len(row) == 4
+			score = 0
+			if len(row) == 4:
+				score = int(row[2])
+			key = write.term_key(row[0], row[1])
+			if key in stats:
+				matched = matched + 1
+			counters = combine(stats.get(-1 - count), stats.get(key))
+			count = count + 1
+			if counters is not None:
+				score = score + counters[DELTA]
+				answered = answered + 1
+				span = span + counters[LAST_DAY] - counters[FIRST_DAY]
+				totals = [x + y for x, y in zip(totals, counters)]
+				if args.terms:
+					term_rows.append(['term', path, row[0], counters[ANSWERS],
+						counters[FIRST], score,
+						ratio(counters[LAST_DAY] - counters[FIRST_DAY], counters[DAYS] - 1),
+						ratio(counters[MS], counters[TIMED])])
+			if score >= args.target_count:
+				mastered = mastered + 1
+			elif score >= args.target_count - margin:
+				close = close + 1
+	keyed = sum(1 for slot in stats if slot >= 0)
+	if (len(stats) > 0 and -1 - min(stats) >= count) or matched < keyed:
+		raise Exception('log does not match')
+	return [['deck', path, count, answered, totals[ANSWERS],
+		ratio(totals[FIRST], totals[ANSWERS]), len(days),
+		ratio(span, totals[DAYS] - answered), ratio(totals[DELTA], len(days)),
+		mastered, close, ratio(totals[MS], totals[TIMED])]] + term_rows
+
+def deck_one(task):
+	args, path = task
+	try:
+		return path, deck_stats(args, path), None
+	except Exception as e:
+		return path, None, '%s: %s' % (type(e).__name__, e)
+
+# Yields (path, rows, error) for each deck, the decks are read in a
+# process pool when there are several
+def all_stats(args):
+	if args.decks is None:
+		yield deck_one((args, args.path))
+		return
+	tasks = [(args, path) for path in write.deck_paths(args.decks)]
+	with Pool() as pool:
+		yield from pool.imap(deck_one, tasks)
+
+header = ('# deck\tpath\tterms\tanswered\tanswers\tfirst_right\tdays\t'
+	+ 'review_gap\tscore_per_day\tmastered\tclose\tms\n'
+	+ '# term\tpath\ttarget\tanswers\tfirst_right\tscore\treview_gap\tms\n')
+
+def main():
+	args = parser.parse_args()
+	if args.output == '-':
+		out = sys.stdout
+	else:
+		out = open(args.output, 'w', newline='')
+	failures = 0
+	with out:
+		out.write(header)
+		writer = csv.writer(out, delimiter='\t', quotechar='|',
+					dialect='unix', quoting=csv.QUOTE_MINIMAL)
+		for path, rows, error in all_stats(args):
+			if error is None:
+				writer.writerows(rows)
+			else:
+				print(path + ': ' + error, file=sys.stderr)
+				failures = failures + 1
+	sys.exit(1 if failures > 0 else 0)
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,90 @@
+#
+# Copyright 2026 Gabor Buella
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# 1. Redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# “AS IS” AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED
+# TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+# PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE,
+# EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+# Matching of responses to answers, shared by dp.py and write.py. Both
+# sides are compared by their keys: casefolded, with the whitespace
+# collapsed. With a tolerance, a response that only misses Polish
+# diacritics, or is at most tolerance edits away from the answer, is a
+# near miss.
+
+WRONG = 0
+EXACT = 1
+NEAR = 2
+
+diacritics = str.maketrans('ąćęłńóśźż', 'acelnoszz')
+
+def answer_key(text):
+	return ' '.join(text.casefold().split())
+
+def strip_diacritics(key):
+	return key.translate(diacritics)
+
+# Tells whether the Levenshtein distance of a and b is at most limit. Only
+# the band of cells at most limit away from the diagonal is computed, and
+# it stops as soon as a whole row is over the limit.
+def within_distance(a, b, limit):
+	if abs(len(a) - len(b)) > limit:
+		return False
+	if limit == 0:
+		return a == b
+	over = limit + 1
+	prev = [j if j <= limit else over for j in range(0, len(b) + 1)]
+	for i in range(1, len(a) + 1):
+		row = [over] * (len(b) + 1)
+		if i <= limit:
+			row[0] = i
+		best = row[0]
+		for j in range(max(1, i - limit), min(len(b), i + limit) + 1):
+			d = prev[j - 1]
+			if a[i - 1] != b[j - 1]:
+				d = d + 1
+			if prev[j] + 1 < d:
+				d = prev[j] + 1
+			if row[j - 1] + 1 < d:
+				d = row[j - 1] + 1
+			if d > over:
+				d = over
+			row[j] = d
+			if d < best:
+				best = d
+		if best > limit:
+			return False
+		prev = row
+	return prev[len(b)] <= limit
+
+# Grades a response against the key of the answer, returns EXACT, NEAR
+# or WRONG. Without a tolerance there are no near misses.
+def grade(key, response, tolerance=None):
+	response = answer_key(response)
+	if response == key:
+		return EXACT
+	if tolerance is None or response == '':
+		return WRONG
+	if within_distance(strip_diacritics(response), strip_diacritics(key),
+			tolerance):
+		return NEAR
+	return WRONG
@@ -0,0 +1,124 @@
+#
+# Copyright 2026 Gabor Buella
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# 1. Redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# “AS IS” AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED
+# TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+# PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE,
+# EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+# Optional timing of the hot paths of dp.py and write.py. Enabled with -T
+# or by setting PL_METRICS to an output path; the counters and latency
+# histograms are written there at exit and on SIGUSR1, in the Prometheus
+# text format if the path ends with .prom, as JSON otherwise.
+
+import os
+import json
+import time
+import atexit
+import signal
+import threading
+import contextlib
+from bisect import bisect_left
+
+# Upper bounds of the histogram buckets, in seconds
+buckets = (1e-6, 1e-5, 1e-4, 1e-3, 1e-2, 0.1, 1.0, 10.0, float('inf'))
+
+enabled = False
+output_path = None
+histograms = {}
+# Reentrant, as dump runs as a signal handler, possibly interrupting
+# observe in the same thread
+lock = threading.RLock()
+
+def observe(name, seconds):
+	with lock:
+		h = histograms.get(name)
+		if h is None:
+			h = {'count': 0, 'sum': 0.0, 'buckets': [0] * len(buckets)}
+			histograms[name] = h
+		h['count'] = h['count'] + 1
+		h['sum'] = h['sum'] + seconds
+		h['buckets'][bisect_left(buckets, seconds)] += 1
+
+class Timer:
+	def __init__(self, name):
+		self.name = name
+
+	def __enter__(self):
+		self.start = time.perf_counter()
+		return self
+
+	def __exit__(self, *exc):
+		observe(self.name, time.perf_counter() - self.start)
+		return False
+
+null_timer = contextlib.nullcontext()
+
+def timer(name):
+	if enabled:
+		return Timer(name)
+	return null_timer
+
+def prometheus_text():
+	lines = []
+	for name, h in sorted(histograms.items()):
+		metric = 'pl_' + name.replace('.', '_') + '_seconds'
+		lines.append('# TYPE {} histogram'.format(metric))
+		total = 0
+		for bound, count in zip(buckets, h['buckets']):
+			total = total + count
+			le = '+Inf' if bound == float('inf') else repr(bound)
+			lines.append('{}_bucket{{le="{}"}} {}'.format(metric, le, total))
+		lines.append('{}_sum {}'.format(metric, h['sum']))
+		lines.append('{}_count {}'.format(metric, h['count']))
+	return '\n'.join(lines) + '\n'
+
+def json_text():
+	result = {}
+	for name, h in histograms.items():
+		result[name] = {'count': h['count'], 'sum': h['sum'],
+			'buckets': {('+Inf' if b == float('inf') else repr(b)): c
+				for b, c in zip(buckets, h['buckets'])}}
+	return json.dumps(result, indent=1, sort_keys=True) + '\n'
+
+def dump(*unused):
+	with lock:
+		if output_path.endswith('.prom'):
+			text = prometheus_text()
+		else:
+			text = json_text()
+	tmp_path = output_path + '.tmp'
+	with open(tmp_path, 'w') as f:
+		f.write(text)
+	os.replace(tmp_path, output_path)
+
+def enable(path):
+	global enabled, output_path
+	if path is None:
+		path = os.environ.get('PL_METRICS')
+	if path is None or path == '':
+		return
+	enabled = True
+	output_path = path
+	atexit.register(dump)
+	if hasattr(signal, 'SIGUSR1'):
+		signal.signal(signal.SIGUSR1, dump)
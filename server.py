@@ -0,0 +1,236 @@
+#
+# Copyright 2026 Gabor Buella
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# 1. Redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# “AS IS” AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED
+# TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+# PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE,
+# EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+# Serves dp.py and write.py drills over a Unix socket, keeping the parsed
+# databases in memory between sessions. A client sends the command line
+# of a drill as its first line, e.g. "dp -w -q" or "write -p deck.csv",
+# and then talks to the drill as it would on a terminal:
+#
+#   python server.py -c write -p deck.csv
+
+import sys
+import os
+import argparse
+import shlex
+import copy
+import socket
+import socketserver
+import threading
+import dp
+import write
+import metrics
+
+# Databases loaded by the sessions, reloaded when their file changes
+class Databases:
+	def __init__(self):
+		self.lock = threading.Lock()
+		self.entries = {}
+
+	def get(self, key, path, reader):
+		st = os.stat(path)
+		version = (st.st_size, st.st_mtime_ns)
+		with self.lock:
+			entry = self.entries.get(key)
+			if entry is not None and entry[0] == version:
+				return entry[1]
+		data = reader(path)
+		with self.lock:
+			self.entries[key] = (version, data)
+		return data
+
+	def load(self, path, reader):
+		return self.get((reader.__name__, path), path,
+			lambda p: dp.load_cached(p, reader))
+
+databases = Databases()
+
+# The form indexes of dp.py, see dp.load_forms
+def load_forms(args):
+	indexes = []
+	for path, reader in ((args.path, dp.read_noun_forms),
+			(args.adjdb_path, dp.read_adj_forms)):
+		indexes.append(databases.get(('forms', path), path,
+			lambda p: dp.load_cached(p, reader, '.forms')))
+	return indexes
+
+# The decks and hard files a session rewrites, one session at a time each
+busy_paths = set()
+busy_lock = threading.Lock()
+
+def claim(path):
+	with busy_lock:
+		if path in busy_paths:
+			return False
+		busy_paths.add(path)
+	return True
+
+def release(path):
+	with busy_lock:
+		busy_paths.remove(path)
+
+# Parses the command line of a session, with the usage, help and errors
+# of argparse sent to the client
+def parse_args(parser, argv, print):
+	parser = copy.copy(parser)
+	parser.print_usage = lambda file=None: print(parser.format_usage().rstrip())
+	parser.print_help = lambda file=None: print(parser.format_help().rstrip())
+	def exit(status=0, message=None):
+		if message:
+			print(message.rstrip())
+		sys.exit(status)
+	parser.exit = exit
+	return parser.parse_args(argv)
+
+def dp_session(argv, input, print):
+	args = parse_args(dp.parser, argv, print)
+	if args.identify:
+		args.preps = False
+	args.hard_path = os.path.abspath(args.hard_path)
+	if not claim(args.hard_path):
+		print('hard file is in use: ' + args.hard_path)
+		return
+	try:
+		hards = dp.read_hards(args.hard_path)
+		drill = dp.load_drill(args, hards, databases.load)
+		try:
+			if args.identify:
+				dp.run_identify(drill, load_forms(args), hards, input, print)
+			else:
+				dp.run_drill(drill, hards, input, print)
+		finally:
+			dp.save_hards(args.hard_path, hards, print)
+	finally:
+		release(args.hard_path)
+
+def write_session(argv, input, print):
+	args = parse_args(write.parser, argv, print)
+	if args.merge or args.convert_log:
+		print('-m and -B are not available in the server')
+		return
+	# The same deck under any name shares the busy flag, the cached terms
+	# and the log
+	args.path = os.path.abspath(args.path)
+	path = args.path
+	if not claim(path):
+		print('deck is in use: ' + path)
+		return
+	try:
+		key = ('read_terms', path, args.start, args.end, args.target_count)
+		id, terms = databases.get(key, path, lambda p: write.read_terms(args))
+		if write.term_count(terms) == 0:
+			return
+		terms = write.copy_terms(terms)
+		logpath = path + '.log'
+		write.readlog_checkpointed(logpath, terms, id)
+		scheduler = write.schedulers[args.scheduler](terms, args.target_count,
+			args.slow)
+		with write.open_log(logpath, args) as log:
+			write.review_loop(scheduler, log, id, input, print, args.tolerance)
+	finally:
+		release(path)
+
+sessions = {'dp': dp_session, 'write': write_session}
+
+class SessionHandler(socketserver.StreamRequestHandler):
+	def send(self, text):
+		self.wfile.write(text.encode())
+		self.wfile.flush()
+
+	def input(self, prompt=''):
+		self.send(prompt)
+		line = self.rfile.readline()
+		if line == b'':
+			raise EOFError
+		return line.decode().rstrip('\r\n')
+
+	def print(self, text=''):
+		self.send(str(text) + '\n')
+
+	def handle(self):
+		try:
+			argv = shlex.split(self.input())
+			if len(argv) == 0 or argv[0] not in sessions:
+				self.print('usage: dp|write [options]')
+				return
+			sessions[argv[0]](argv[1:], self.input, self.print)
+		except (EOFError, ConnectionError):
+			pass
+		except SystemExit:
+			# argparse exits on --help and on bad options
+			pass
+		except Exception as e:
+			self.print('error: ' + str(e))
+
+class Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+	daemon_threads = True
+
+def serve(path):
+	if os.path.exists(path):
+		os.remove(path)
+	with Server(path, SessionHandler) as server:
+		try:
+			server.serve_forever()
+		except KeyboardInterrupt:
+			pass
+	os.remove(path)
+
+def copy_output(sock):
+	while True:
+		data = sock.recv(4096)
+		if not data:
+			break
+		sys.stdout.buffer.write(data)
+		sys.stdout.flush()
+	os._exit(0)
+
+def client(path, argv):
+	sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+	sock.connect(path)
+	sock.sendall((shlex.join(argv) + '\n').encode())
+	threading.Thread(target=copy_output, args=(sock,), daemon=True).start()
+	try:
+		for line in sys.stdin:
+			sock.sendall(line.encode())
+	except KeyboardInterrupt:
+		pass
+	sock.shutdown(socket.SHUT_WR)
+	threading.Event().wait()
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description='drill server.')
+	parser.add_argument('-u', help='socket path', default='pldrill.sock',
+			dest='socket')
+	parser.add_argument('-T', help='write timing metrics to this file, .prom or JSON',
+			dest='metrics')
+	parser.add_argument('-c', help='connect and run a drill', nargs=argparse.REMAINDER,
+			dest='client')
+	args = parser.parse_args()
+	if args.client is not None:
+		client(args.socket, args.client)
+	else:
+		metrics.enable(args.metrics)
+		serve(args.socket)
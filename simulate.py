@@ -0,0 +1,157 @@
+#
+# Copyright 2026 Gabor Buella
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# 1. Redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# “AS IS” AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED
+# TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+# PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE,
+# EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+# Replays the logs of write.py decks under other scoring parameters: the
+# delta factor and cap of write.compute_term_delta, and the target score.
+# Every combination of the given values is simulated, the decks and
+# parameters are spread over a process pool:
+#
+#   python simulate.py -A decks -f 2 4 8 -c 42 84 -t 500 1000
+#
+# The scores start from the deck CSV. A first time right answer in the
+# log earns the delta the simulated parameters give, a retry only moves
+# the last day, as in write.grade_correct. The answers to terms already
+# at the simulated target are dropped, as they would not have been asked.
+# For each combination a line is written with the answers replayed and
+# dropped, the score earned per session, the terms mastered during the
+# log and the mean days it took them from their first answer, the terms
+# left below the target, and the sessions projected to bring them to the
+# target at the rate of score per session seen in the log.
+
+import sys
+import argparse
+import itertools
+from multiprocessing import Pool
+import write
+import logstats
+
+parser = argparse.ArgumentParser(description='Simulate write.py scoring parameters.')
+parser.add_argument('-p', help='CSV file path', default='pl_vocab_write.csv',
+		dest='path')
+parser.add_argument('-A', help='every deck with a log in a directory, or listed in a file',
+		dest='decks')
+parser.add_argument('-f', help='delta factors', type=int, nargs='+',
+		default=[write.delta_factor], dest='factors')
+parser.add_argument('-c', help='delta caps', type=int, nargs='+',
+		default=[write.delta_cap], dest='caps')
+parser.add_argument('-t', help='target write scores', type=int, nargs='+',
+		default=[1000], dest='targets')
+parser.add_argument('-o', help='output file', default='-', dest='output')
+
+# The totals of a simulation, summed over the decks
+SESSIONS, ANSWERS, DROPPED, EARNED, MASTERED, MASTERY_DAYS, LEFT, REMAINING = range(0, 8)
+
+# Returns the totals of a deck replayed with the (factor, cap, target)
+# parameters
+def simulate_deck(params, path):
+	factor, cap, target = params
+	id, terms = write.read_terms(argparse.Namespace(path=path, start=0, end=0,
+		target_count=target))
+	count = write.term_count(terms)
+	score = terms['score']
+	last = terms['last']
+	started = {}
+	totals = [0] * 8
+	for _, chunk in write.log_chunks(path + '.log'):
+		for keyed, term, delta, day in zip(*chunk[:4]):
+			if term == -1:
+				if delta != id:
+					raise Exception('log does not match')
+				totals[SESSIONS] = totals[SESSIONS] + 1
+				continue
+			index = write.log_slot(keyed, term, terms['index'], count)
+			if score[index] >= target:
+				totals[DROPPED] = totals[DROPPED] + 1
+				continue
+			totals[ANSWERS] = totals[ANSWERS] + 1
+			if index not in started:
+				started[index] = day
+			if delta > 0:
+				earned = write.compute_term_delta(last[index], day, factor, cap)
+				score[index] = score[index] + earned
+				last[index] = day
+				totals[EARNED] = totals[EARNED] + earned
+				if score[index] >= target:
+					totals[MASTERED] = totals[MASTERED] + 1
+					totals[MASTERY_DAYS] = totals[MASTERY_DAYS] + day - started[index]
+			elif score[index] != 0:
+				last[index] = day
+	for s in score:
+		if s < target:
+			totals[LEFT] = totals[LEFT] + 1
+			totals[REMAINING] = totals[REMAINING] + target - s
+	return totals
+
+def simulate_one(task):
+	params, path = task
+	try:
+		return params, path, simulate_deck(params, path), None
+	except Exception as e:
+		return params, path, None, '%s: %s' % (type(e).__name__, e)
+
+def result_row(params, totals):
+	per_session = logstats.ratio(totals[EARNED], totals[SESSIONS])
+	projected = ''
+	if totals[EARNED] > 0:
+		projected = '{:.1f}'.format(totals[REMAINING] * totals[SESSIONS]
+			/ totals[EARNED])
+	return list(params) + [totals[SESSIONS], totals[ANSWERS], totals[DROPPED],
+		per_session, totals[MASTERED],
+		logstats.ratio(totals[MASTERY_DAYS], totals[MASTERED]), totals[LEFT], projected]
+
+header = ('# factor\tcap\ttarget\tsessions\tanswers\tdropped\tscore_per_session\t'
+	+ 'mastered\tmastery_days\tleft\tprojected_sessions\n')
+
+def main():
+	args = parser.parse_args()
+	if args.decks is None:
+		paths = [args.path]
+	else:
+		paths = write.deck_paths(args.decks)
+	params = list(itertools.product(args.factors, args.caps, args.targets))
+	results = {p: [0] * 8 for p in params}
+	failures = 0
+	with Pool() as pool:
+		for p, path, totals, error in pool.imap_unordered(simulate_one,
+				itertools.product(params, paths)):
+			if error is None:
+				results[p] = [x + y for x, y in zip(results[p], totals)]
+			else:
+				print('{} {}: {}'.format(path, p, error), file=sys.stderr)
+				failures = failures + 1
+	if args.output == '-':
+		out = sys.stdout
+	else:
+		out = open(args.output, 'w')
+	with out:
+		out.write(header)
+		for p in params:
+			out.write('\t'.join(str(x) for x in result_row(p, results[p])) + '\n')
+	sys.exit(1 if failures > 0 else 0)
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,89 @@
+#
+# Copyright 2026 Gabor Buella
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# 1. Redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# “AS IS” AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED
+# TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+# PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE,
+# EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+import unittest
+import io
+import os
+import dp
+import declcheck
+
+noun_text = """# comment
+
+1	f	feminine captive
+nominative	więźniarka	więźniarki
+genitive	więźniarki	więźniarek
+dative	więźniarce	więźniarkom
+accusative	więźniarkę	więźniarki
+instrumental	więźniarką	więźniarkami
+locative	więźniarce	więźniarkach
+vocative	więźniarko	więźniarki
+
+10	n	city
+nominative	miasto	miasta
+genitive	miasta	miast
+dative	miastu	miastom
+accusative	miasto	miasta
+instrumental	miastem	miastami
+locative	mieście	miastach
+vocative	miasto	miasta
+
+20	n	child	irr
+nominative	dziecko	dzieci
+"""
+
+class test_declcheck(unittest.TestCase):
+	def test_compact(self):
+		lines = io.StringIO(noun_text).readlines()
+		out = io.StringIO()
+		declcheck.compact(lines, out)
+		text = out.getvalue()
+		self.assertIn('1\tf\tfeminine captive\tgen\nnominative\twięźniarka\twięźniarki\n\n',
+			text)
+		self.assertIn('10\tn\tcity\tgen\nnominative\tmiasto\tmiasta\n'
+			+ 'locative\tmieście\tmiastach\n\n', text)
+		self.assertTrue(text.endswith('20\tn\tchild\tirr\nnominative\tdziecko\tdzieci\n'))
+		self.assertEqual(dp.parse_nouns(io.StringIO(text), 0),
+			dp.parse_nouns(lines, 0))
+		self.assertEqual([declcheck.is_generated(entry)
+			for entry in declcheck.entries(io.StringIO(text))],
+			[False, True, True, False])
+
+	# The forms the rules generate for the nouns flagged 'gen' in pldb.csv
+	# are the ones entered by hand before the flag
+	def test_generated_nouns(self):
+		dir = os.path.dirname(os.path.abspath(__file__))
+		with open(os.path.join(dir, 'pldb.csv'), newline='') as f:
+			nouns = [dp.parse_nouns(entry, 0)[0]
+				for entry in declcheck.entries(f) if declcheck.is_generated(entry)]
+		with open(os.path.join(dir, 'test_pldb_gen.csv'), newline='') as f:
+			expected = dp.parse_nouns(f, 0)
+		self.assertEqual(len(nouns), len(expected))
+		for noun, expected_noun in zip(nouns, expected):
+			self.assertEqual(noun, expected_noun)
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,47 @@
+#
+# Copyright 2026 Gabor Buella
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# 1. Redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# “AS IS” AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED
+# TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+# PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE,
+# EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+import unittest
+import decline
+
+class test_decline(unittest.TestCase):
+	def test_decline(self):
+		forms = decline.decline('przypadek', 'masculine_inanimate')
+		self.assertEqual(forms['genitive'], ['przypadku', 'przypadków'])
+		self.assertEqual(forms['instrumental'], ['przypadkiem', 'przypadkami'])
+		self.assertEqual(forms['nominative'], ['przypadek', 'przypadki'])
+		forms = decline.decline('pracownik', 'masculine_personal')
+		self.assertEqual(forms['nominative'], ['pracownik', 'pracownicy'])
+		self.assertEqual(forms['accusative'], ['pracownika', 'pracowników'])
+		forms = decline.decline('miejscowość', 'feminine')
+		self.assertEqual(forms['instrumental'], ['miejscowością', 'miejscowościami'])
+		forms = decline.decline('mieszkanie', 'neuter')
+		self.assertEqual(forms['genitive'], ['mieszkania', 'mieszkań'])
+		self.assertEqual(decline.decline('imię', 'neuter'), None)
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,276 @@
+#
+# Copyright 2025 Gabor Buella
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# 1. Redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# “AS IS” AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED
+# TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+# PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE,
+# EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+import unittest
+import os
+import tempfile
+from unittest.mock import patch
+import dp
+
+noun_text = """# comment
+
+7	f	captive
+nominative	więźniarka	więźniarki
+genitive	więźniarki	więźniarek
+dative	więźniarce	więźniarkom
+accusative	więźniarkę	więźniarki
+instrumental	więźniarką	więźniarkami
+locative	więźniarce	więźniarkach
+vocative	więźniarko	więźniarki
+
+8	nps	I	irr
+nominative	ja
+genitive	mnie
+"""
+
+adj = dp.make_adj({'id': 2, 'def': 'good', 'decl': {
+	'viril_plural': {'genitive': 'dobrych'},
+	'nonviril_plural': {'genitive': 'dobrych'},
+	'masculine_animate': {'genitive': 'dobrego'},
+	'masculine_inanimate': {'genitive': 'dobrego'},
+	'feminine': {'genitive': 'dobrej'},
+	'neuter': {'genitive': 'dobrego'}}})
+
+def drill_args(*argv):
+	return dp.parser.parse_args(['-C'] + list(argv))
+
+def make_drill(args, nouns):
+	drill = {'plan': dp.compile_plan(args), 'adjs': [], 'adj_table': None,
+		'preps': dp.index_preps({}), 'nouns': nouns,
+		'noun_weights': [1] * len(nouns)}
+	return drill
+
+class test_dp(unittest.TestCase):
+	def test_parse_nouns(self):
+		nouns = dp.parse_nouns(noun_text.splitlines(True), 0)
+		self.assertEqual([n.id for n in nouns], [7, 8])
+		self.assertEqual(nouns[0].gender, dp.gender_codes['feminine'])
+		self.assertEqual(len(nouns[0].decl), 7)
+		self.assertEqual(nouns[0].decl[dp.case_codes['genitive']],
+			('więźniarki', 'więźniarek'))
+		self.assertTrue(nouns[1].irregular)
+		self.assertEqual(nouns[1].decl[1], ('mnie',))
+		self.assertEqual(nouns[1].decl[2], None)
+		self.assertIs(nouns[0].decl[3][1], nouns[0].decl[1][0])
+		nouns = dp.parse_nouns(noun_text.splitlines(True), 8)
+		self.assertEqual([n.id for n in nouns], [7])
+
+	def test_load_cached(self):
+		with tempfile.TemporaryDirectory() as dir:
+			path = os.path.join(dir, 'nouns.csv')
+			with open(path, 'w') as f:
+				f.write(noun_text)
+			nouns = dp.load_cached(path, dp.read_nouns)
+			self.assertEqual(dp.load_cached(path, None), nouns)
+			with open(path + '.cache', 'rb') as f:
+				key = dp.pickle.load(f)
+			with open(path + '.cache', 'wb') as f:
+				dp.pickle.dump(key, f)
+				f.write(b'cdp\nNoSuchRecord\n.')
+			self.assertEqual(dp.load_cached(path, dp.read_nouns), nouns)
+			self.assertEqual(dp.load_cached(path, None), nouns)
+			rules = os.path.join(dir, 'decline.py')
+			with open(rules, 'w') as f:
+				f.write('# edited rules\n')
+			with patch.object(dp.decline, '__file__', rules):
+				self.assertEqual(dp.load_cached(path, dp.read_nouns), nouns)
+				self.assertEqual(dp.load_cached(path, None), nouns)
+			with self.assertRaises(TypeError):
+				dp.load_cached(path, None)
+
+	def test_alias(self):
+		weights = [1, 4, 0, 2.5, 1]
+		prob, alias = dp.build_alias(weights)
+		n = len(weights)
+		for i in range(0, n):
+			p = prob[i]
+			for j in range(0, n):
+				if alias[j] == i and j != i:
+					p = p + 1 - prob[j]
+			self.assertAlmostEqual(p / n, weights[i] / sum(weights))
+
+	def test_draw_nouns(self):
+		nouns = list(range(0, 50))
+		drill = {'nouns': nouns, 'noun_weights': [1] * 25 + [100] * 24 + [0]}
+		drawn = list(dp.draw_nouns(drill))
+		self.assertEqual(sorted(set(drawn)), nouns[:49])
+		self.assertEqual(len(drawn), 25 + 2400)
+		self.assertEqual(drawn.count(30), 100)
+		self.assertGreater(sum(1 for n in drawn[:25] if n >= 25), 20)
+		drill['noun_weights'] = [1, 4, 1.5, 0.5] + [0] * 46
+		self.assertEqual(sorted(dp.draw_nouns(drill)), [0, 1, 1, 1, 1, 2, 2, 3])
+
+	def test_noun_questions(self):
+		nouns = dp.parse_nouns(noun_text.splitlines(True), 0)
+		drill = make_drill(drill_args(), nouns)
+		qs = list(dp.noun_questions(nouns[0], drill))
+		self.assertEqual([q.form for q in qs],
+			['więźniarka', 'więźniarki', 'więźniarki', 'więźniarek',
+			'więźniarce', 'więźniarkę', 'więźniarki', 'więźniarką',
+			'więźniarce'])
+		self.assertEqual(qs[3].prompt.split(), ['genitive', 'plural', ':'])
+		self.assertEqual(qs[3].hint, 'więźniarka')
+		self.assertEqual(qs[3].noun_id, 7)
+		self.assertEqual(qs[3].adj_id, -1)
+
+		drill = make_drill(drill_args('-c', 'vocative', '-n', 'plural', '-F'), nouns)
+		qs = list(dp.noun_questions(nouns[0], drill))
+		self.assertEqual([q.answer for q in qs], ['więźniarki'])
+
+		qs = list(dp.questions(make_drill(drill_args('-n', 'plural'), nouns[:1])))
+		self.assertEqual([q.noun_id for q in qs], [7, 7, 7])
+		qs = list(dp.questions(make_drill(drill_args('-g', 'masculine'), nouns)))
+		self.assertEqual(qs, [])
+
+	def test_grade_batch(self):
+		nouns = dp.parse_nouns(noun_text.splitlines(True), 0)
+		drill = make_drill(drill_args('-w'), nouns)
+		drill['adjs'] = [adj]
+		drill['adj_table'] = dp.build_alias([1])
+		drill['plan']['cases'] = frozenset([dp.case_codes['genitive']])
+		qs = list(dp.noun_questions(nouns[0], drill))
+		drill['preps'] = dp.index_preps({'genitive_singular': [
+			{'preposition': 'od', 'question_prep': 'from'},
+			{'preposition': 'do', 'question_prep': 'to'}]})
+		self.assertEqual([q.qid for q in qs], ['7:1:0:2:-1', '7:1:1:2:-1'])
+		records = [(qs[0].qid, ' dobrej  więźniarki'), (qs[1].qid, 'więźniarek'),
+			('7:1:1:-1:-1', 'więźniarek'), ('9:1:1:-1:-1', 'x'), ('bad', 'x'),
+			('7:-1:0:-1:-1', 'więźniarko'), ('7:1:-1:-1:-1', 'więźniarek'),
+			('7:7:0:-1:-1', 'x'), ('7:1:2:-1:-1', 'x'),
+			('7:1:0:-1:1', 'do więźniarki'), ('7:1:0:-1:-2', 'od więźniarki')]
+		self.assertEqual(list(dp.grade_batch(drill, records)),
+			[('7:1:0:2:-1', 'ok', 'dobrej więźniarki'),
+			('7:1:1:2:-1', 'wrong', 'dobrych więźniarek'),
+			('7:1:1:-1:-1', 'ok', 'więźniarek'),
+			('9:1:1:-1:-1', 'invalid', ''),
+			('bad', 'invalid', ''),
+			('7:-1:0:-1:-1', 'invalid', ''),
+			('7:1:-1:-1:-1', 'invalid', ''),
+			('7:7:0:-1:-1', 'invalid', ''),
+			('7:1:2:-1:-1', 'invalid', ''),
+			('7:1:0:-1:1', 'ok', 'do więźniarki'),
+			('7:1:0:-1:-2', 'invalid', '')])
+		drill['plan']['tolerance'] = 1
+		records = [(qs[0].qid, 'dobrej wiezniarki'), (qs[1].qid, 'dobrych wiezniarkami'),
+			('7:1:1:-1:-1', 'wiezńiarek')]
+		self.assertEqual([r[1] for r in dp.grade_batch(drill, records)],
+			['near', 'wrong', 'near'])
+
+	def test_compose_question(self):
+		preps = dp.index_preps({'genitive_singular': [{'preposition': 'do',
+				'question_prep': 'to'}]})
+		prep = preps[dp.case_codes['genitive'] * 2 + dp.SINGULAR][0]
+		noun = dp.Noun(3, dp.gender_codes['masculine_personal'], 'prisoner',
+			(), False, False, False)
+		q = dp.compose_question(noun, dp.gender_codes['masculine_personal'],
+			dp.case_codes['genitive'], dp.SINGULAR, 'więźnia', 'więzień',
+			adj, prep)
+		self.assertEqual(q.answer, 'do dobrego więźnia')
+		self.assertEqual(q.prompt.split(), ['to', 'good', 'singular', ':'])
+		self.assertEqual(q.adj_id, 2)
+		q = dp.compose_question(noun, dp.gender_codes['masculine_personal'],
+			dp.case_codes['genitive'], dp.PLURAL, 'więźniów', 'więzień',
+			adj, None)
+		self.assertEqual(q.answer, 'dobrych więźniów')
+		self.assertEqual(q.prompt.split(), ['good', 'genitive', 'plural', ':'])
+
+	def test_hard_times(self):
+		hards = dp.new_hards()
+		q = dp.Question('?', 'kot', 'kot', 'kot', 3, -1, '3:0:0:-1:-1')
+		answers = iter(['', 'kot'])
+		self.assertEqual(dp.ask(q, '', hards, lambda p: next(answers),
+			lambda *a: None), dp.match.EXACT)
+		self.assertEqual(hards['noun_times'][3][1], 1)
+		self.assertEqual(hards['adj_times'], {})
+		self.assertTrue(hards['changed'])
+		hards['noun_times'] = {3: [9000, 2], 4: [1000, 2], 5: [2000, 1]}
+		hards['adj_times'] = {2: [100, 1]}
+		with tempfile.TemporaryDirectory() as dir:
+			path = os.path.join(dir, 'hard.csv')
+			printed = []
+			dp.save_hards(path, hards, printed.append)
+			self.assertEqual(printed, ['overwritten file: ' + path])
+			self.assertEqual(os.listdir(dir), ['hard.csv'])
+			self.assertEqual(dp.read_hards(path), dict(hards, changed=False))
+		items = [dp.Adjective(id, '', ()) for id in (3, 4, 5, 6)]
+		selected, weights = dp.weigh(items, {4}, False, 4, hards['noun_times'])
+		self.assertEqual(weights, [1.875, 4, 1, 1])
+		selected, weights = dp.weigh(items, {3}, False, 4, hards['noun_times'])
+		self.assertEqual(weights, [4, 1, 1, 1])
+		selected, weights = dp.weigh(items, {3}, False, 1.5, hards['noun_times'])
+		self.assertEqual(weights, [1.5, 1, 1, 1])
+		selected, weights = dp.weigh(items, {4}, False, 0.5, hards['noun_times'])
+		self.assertEqual(weights, [1, 0.5, 1, 1])
+		selected, weights = dp.weigh(items, {3, 4}, True, 4, hards['noun_times'])
+		self.assertEqual((selected, weights), (items[:2], [1.875, 1]))
+
+	def test_form_index(self):
+		with tempfile.TemporaryDirectory() as dir:
+			path = os.path.join(dir, 'nouns.csv')
+			with open(path, 'w') as f:
+				f.write(noun_text)
+			nouns = dp.read_noun_forms(path)
+			path = os.path.join(dir, 'adjs.csv')
+			with open(path, 'w') as f:
+				f.write('2\tgood\ngenitive\tdobrego\tdobrej\tdobrego\tdobrych\n')
+			adjs = dp.read_adj_forms(path)
+		indexes = [nouns, adjs]
+		self.assertEqual(sorted((a.case, a.number) for a in nouns['więźniarki']),
+			[(0, dp.PLURAL), (1, dp.SINGULAR), (3, dp.PLURAL), (6, dp.PLURAL)])
+		self.assertEqual(sorted(a.gender for a in adjs['dobrej']),
+			[dp.gender_codes['feminine']])
+		self.assertEqual(nouns['mnie'], [dp.Analysis('noun', 8, 1, dp.SINGULAR,
+			dp.gender_codes['pronoun'])])
+		self.assertEqual(dp.phrase_analyses(indexes, 'więźniarki'),
+			{'genitive singular', 'nominative plural', 'accusative plural',
+			'vocative plural'})
+		self.assertEqual(dp.phrase_analyses(indexes, 'dobrej więźniarki'),
+			{'genitive singular'})
+		self.assertEqual(dp.phrase_analyses(indexes, 'dobrego więźniarki'), set())
+		self.assertEqual(dp.phrase_analyses(indexes, 'x'), set())
+
+		nouns = dp.parse_nouns(noun_text.splitlines(True), 0)
+		drill = make_drill(drill_args('-w'), nouns[:1])
+		drill['adjs'] = [adj]
+		drill['adj_table'] = dp.build_alias([1])
+		drill['plan']['cases'] = frozenset([dp.case_codes['genitive']])
+		prompts = []
+		answers = iter(['genitive plural', '', 'genitive singular', 'genitive plural'])
+		def input(prompt):
+			prompts.append(prompt.split())
+			return next(answers)
+		output = []
+		hards = dp.new_hards()
+		for question in dp.noun_questions(drill['nouns'][0], drill):
+			dp.identify(question, indexes, hards, input, output.append)
+		self.assertEqual(prompts, [['dobrej', 'więźniarki', ':']] * 3
+			+ [['dobrych', 'więźniarek', ':']])
+		self.assertEqual(output, ['It is "genitive singular"'])
+		self.assertEqual(hards['adj_times'][2][1], 2)
+
+if __name__ == '__main__':
+	unittest.main()
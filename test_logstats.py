@@ -0,0 +1,63 @@
+#
+# Copyright 2026 Gabor Buella
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# 1. Redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# “AS IS” AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED
+# TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+# PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE,
+# EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+
+import unittest
+import argparse
+import os
+import tempfile
+import logstats
+import write
+
+class test_logstats(unittest.TestCase):
+	def test_deck_stats(self):
+		with tempfile.TemporaryDirectory() as dir:
+			path = os.path.join(dir, 'deck.csv')
+			with open(path, 'w') as deck:
+				deck.write('id\t3\na\tb\t95\t730100\na2\tb2\na3\tb3\t100\t730100\n')
+			with open(path + '.log', 'w') as log:
+				log.write('id\t3\n0\t4\t730120\t2000\n0\t0\t730120\t0\n'
+					+ 'id\t3\n')
+				log.write(write.log_record(write.term_key('a', 'b'), 8, 730122,
+					False, 1000).decode())
+				log.write(write.log_record(write.term_key('a2', 'b2'), 1, 730122,
+					False).decode())
+			args = argparse.Namespace(target_count=100, margin=None, terms=True)
+			rows = logstats.deck_stats(args, path)
+			self.assertEqual(rows[0], ['deck', path, 3, 2, 4, '0.75', 2,
+				'2.00', '6.50', 2, 0, '1500.00'])
+			self.assertEqual(rows[1:], [['term', path, 'a', 3, 2, 107, '2.00', '1500.00'],
+				['term', path, 'a2', 1, 1, 1, '', '']])
+			args.margin = 99
+			self.assertEqual(logstats.deck_stats(args, path)[0][9:11], [2, 1])
+			with open(path + '.log', 'w') as log:
+				log.write('id\t2\n')
+			with self.assertRaises(Exception):
+				logstats.deck_stats(args, path)
+
+if __name__ == '__main__':
+	unittest.main()
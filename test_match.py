@@ -0,0 +1,56 @@
+#
+# Copyright 2026 Gabor Buella
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# 1. Redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# “AS IS” AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED
+# TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+# PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE,
+# EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import unittest
+import match
+
+class test_match(unittest.TestCase):
+	def test_answer_key(self):
+		self.assertEqual(match.answer_key('  Dobry \t Wieczór '), 'dobry wieczór')
+		self.assertEqual(match.strip_diacritics('źdźbło łąki'), 'zdzblo laki')
+
+	def test_within_distance(self):
+		self.assertTrue(match.within_distance('kot', 'kot', 0))
+		self.assertFalse(match.within_distance('kot', 'kto', 0))
+		self.assertTrue(match.within_distance('kot', 'kto', 2))
+		self.assertFalse(match.within_distance('kot', 'kto', 1))
+		self.assertTrue(match.within_distance('kot', 'koty', 1))
+		self.assertTrue(match.within_distance('', 'ab', 2))
+		self.assertFalse(match.within_distance('abc', 'xyz', 2))
+		self.assertTrue(match.within_distance('przyjaciel', 'przyjacile', 2))
+		self.assertFalse(match.within_distance('abcdef', 'badcfe', 2))
+
+	def test_grade(self):
+		key = match.answer_key('Żółw')
+		self.assertEqual(match.grade(key, ' żółw'), match.EXACT)
+		self.assertEqual(match.grade(key, 'zolw'), match.WRONG)
+		self.assertEqual(match.grade(key, 'zolw', 0), match.NEAR)
+		self.assertEqual(match.grade(key, 'zołwy', 0), match.WRONG)
+		self.assertEqual(match.grade(key, 'zołwy', 1), match.NEAR)
+		self.assertEqual(match.grade(key, '', 3), match.WRONG)
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,115 @@
+#
+# Copyright 2026 Gabor Buella
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# 1. Redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# “AS IS” AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED
+# TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+# PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE,
+# EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+import unittest
+import os
+import tempfile
+import socket
+import threading
+import server
+import write
+
+class test_server(unittest.TestCase):
+	def setUp(self):
+		self.dir = tempfile.TemporaryDirectory()
+		self.socket_path = os.path.join(self.dir.name, 'test.sock')
+		self.server = server.Server(self.socket_path, server.SessionHandler)
+		self.thread = threading.Thread(target=self.server.serve_forever)
+		self.thread.start()
+
+	def tearDown(self):
+		self.server.shutdown()
+		self.server.server_close()
+		self.thread.join()
+		self.dir.cleanup()
+
+	def connect(self, command):
+		sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+		sock.connect(self.socket_path)
+		sock.sendall((command + '\n').encode())
+		return sock, sock.makefile('rb')
+
+	def read_until(self, f, text):
+		lines = []
+		while True:
+			line = f.readline().decode()
+			self.assertNotEqual(line, '')
+			lines.append(line)
+			if line == text + '\n':
+				return lines
+
+	def test_write_session(self):
+		path = os.path.join(self.dir.name, 'deck.csv')
+		with open(path, 'w') as deck:
+			deck.write('id\t3\nkot\tcat\n')
+		relative = os.path.relpath(path)
+		sock, f = self.connect('write -p ' + relative)
+		self.read_until(f, 'cat')
+		sock.sendall(b'kot\n')
+		self.read_until(f, 'cat')
+		sock.sendall(b'kto\n')
+		self.assertIn('Try again!\n', self.read_until(f, 'cat'))
+
+		other, other_f = self.connect('write -p ' + path)
+		self.assertEqual(other_f.read().decode(),
+			'deck is in use: ' + path + '\n')
+		other_f.close()
+		other.close()
+
+		sock.shutdown(socket.SHUT_WR)
+		self.assertEqual(f.read(), b'')
+		f.close()
+		sock.close()
+		id, terms = write.read_terms(
+			write.parser.parse_args(['-p', path]))
+		write.readlog(path + '.log', terms, id)
+		self.assertEqual(list(terms['score']), [1])
+
+	def test_usage(self):
+		sock, f = self.connect('ls')
+		self.assertEqual(f.read(), b'usage: dp|write [options]\n')
+		f.close()
+		sock.close()
+
+		sock, f = self.connect('write -t x')
+		output = f.read().decode()
+		self.assertTrue(output.startswith('usage: '))
+		self.assertIn("error: argument -t: invalid int value: 'x'", output)
+		f.close()
+		sock.close()
+
+	def test_busy_hard_file(self):
+		path = os.path.join(self.dir.name, 'hard.csv')
+		self.assertTrue(server.claim(path))
+		try:
+			sock, f = self.connect('dp -E ' + os.path.relpath(path))
+			self.assertEqual(f.read().decode(),
+				'hard file is in use: ' + path + '\n')
+			f.close()
+			sock.close()
+		finally:
+			server.release(path)
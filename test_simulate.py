@@ -0,0 +1,56 @@
+#
+# Copyright 2026 Gabor Buella
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# 1. Redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# “AS IS” AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED
+# TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+# PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE,
+# EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+
+import unittest
+import os
+import tempfile
+import simulate
+
+class test_simulate(unittest.TestCase):
+	def test_simulate_deck(self):
+		with tempfile.TemporaryDirectory() as dir:
+			path = os.path.join(dir, 'deck.csv')
+			with open(path, 'w') as deck:
+				deck.write('id\t3\na\tb\na2\tb2\t3\t730118\n')
+			with open(path + '.log', 'w') as log:
+				log.write('id\t3\n0\t1\t730120\n1\t0\t730120\n'
+					+ 'id\t3\n0\t8\t730122\n1\t16\t730122\n0\t4\t730123\n')
+			self.assertEqual(simulate.simulate_deck((4, 84, 100), path),
+				[2, 5, 0, 21, 0, 0, 2, 176])
+			self.assertEqual(simulate.simulate_deck((10, 15, 15), path),
+				[2, 4, 1, 31, 2, 4, 0, 0])
+			self.assertEqual(simulate.result_row((10, 15, 15),
+				[2, 4, 1, 31, 2, 4, 0, 0]),
+				[10, 15, 15, 2, 4, 1, '15.50', 2, '2.00', 0, '0.0'])
+			with open(path + '.log', 'w') as log:
+				log.write('id\t2\n')
+			with self.assertRaises(Exception):
+				simulate.simulate_deck((4, 84, 100), path)
+
+if __name__ == '__main__':
+	unittest.main()
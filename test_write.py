@@ -25,150 +25,326 @@
 # EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
 import unittest
-import copy
+import argparse
+import os
+import tempfile
 from unittest.mock import patch, mock_open
 import write
+import match
 from datetime import date
 
-example_terms = [{'target': 'a', 'def': 'b', 'score': 0, 'last': 0},
+example_rows = [{'target': 'a', 'def': 'b', 'score': 0, 'last': 0},
 	{'target': 'a2', 'def': 'b2', 'score': 0, 'last': 0},
 	{'target': 'a3', 'def': 'b3', 'score': 0, 'last': 0},
 	{'target': 'a4', 'def': 'b4', 'score': 0, 'last': 0}]
 
+def make_terms(rows):
+	terms = write.new_terms()
+	for row in rows:
+		write.add_term(terms, row['target'], row['def'], row['score'], row['last'])
+	return terms
+
+def example_terms():
+	return make_terms(example_rows)
+
+def term_rows(terms):
+	return [{'target': t, 'def': d, 'score': s, 'last': l}
+		for t, d, s, l in zip(terms['target'], terms['def'],
+			terms['score'], terms['last'])]
+
+def read_args(path):
+	return argparse.Namespace(path=path, start=0, end=0, target_count=1000)
+
 class test_term_reading(unittest.TestCase):
 	def test_read_file(self):
 		with patch("builtins.open", mock_open(read_data="id\t1\n")) as mock_file:
-			self.assertEqual(write.read_terms("any"), (1, []))
+			self.assertEqual(write.read_terms(read_args("any")), (1, write.new_terms()))
 			mock_file.assert_called_with("any", newline='')
 		with patch("builtins.open", mock_open(read_data="# comment\nid\t99\n")) as mock_file:
-			self.assertEqual(write.read_terms("any"), (99, []))
+			self.assertEqual(write.read_terms(read_args("any")), (99, write.new_terms()))
 			mock_file.assert_called_with("any", newline='')
 		text = "id\t3\na\tb\n"
 		expected = [{'target': 'a', 'def': 'b', 'score': 0, 'last':0}]
 		with patch("builtins.open", mock_open(read_data=text)) as mock_file:
-			id, t = write.read_terms("any")
+			id, t = write.read_terms(read_args("any"))
 			self.assertEqual(id, 3)
-			self.assertEqual(t, expected)
+			self.assertEqual(term_rows(t), expected)
 		text = text + "c\td\t5\t739479\n"
 		expected.append({'target': 'c', 'def': 'd', 'score': 5, 'last': 739479})
 		with patch("builtins.open", mock_open(read_data=text)) as mock_file:
-			id, t = write.read_terms("any")
+			id, t = write.read_terms(read_args("any"))
 			self.assertEqual(id, 3)
-			self.assertEqual(t, expected)
+			self.assertEqual(term_rows(t), expected)
 
 	def test_compute_term_delta(self):
-		self.assertEqual(write.compute_term_delta(
-			{'target': 'a', 'def': 'b', 'score': 0, 'last':0}, 730120), 1)
-		self.assertEqual(write.compute_term_delta(
-			{'target': 'a', 'def': 'b', 'score': 1, 'last': 730120}, 730120), 1)
-		self.assertEqual(write.compute_term_delta(
-			{'target': 'a', 'def': 'b', 'score': 1, 'last': 730119}, 730120), 4)
-		self.assertEqual(write.compute_term_delta(
-			{'target': 'a', 'def': 'b', 'score': 1, 'last': 730118}, 730120), 8)
-		self.assertEqual(write.compute_term_delta(
-			{'target': 'a', 'def': 'b', 'score': 1, 'last': 730101}, 730120), 76)
-		self.assertEqual(write.compute_term_delta(
-			{'target': 'a', 'def': 'b', 'score': 1, 'last': 730099}, 730120), 84)
-		self.assertEqual(write.compute_term_delta(
-			{'target': 'a', 'def': 'b', 'score': 1, 'last': 730098}, 730120), 84)
-		self.assertEqual(write.compute_term_delta(
-			{'target': 'a', 'def': 'b', 'score': 1, 'last': 730000}, 730120), 84)
+		self.assertEqual(write.compute_term_delta(0, 730120), 1)
+		self.assertEqual(write.compute_term_delta(730120, 730120), 1)
+		self.assertEqual(write.compute_term_delta(730119, 730120), 4)
+		self.assertEqual(write.compute_term_delta(730118, 730120), 8)
+		self.assertEqual(write.compute_term_delta(730101, 730120), 76)
+		self.assertEqual(write.compute_term_delta(730099, 730120), 84)
+		self.assertEqual(write.compute_term_delta(730098, 730120), 84)
+		self.assertEqual(write.compute_term_delta(730000, 730120), 84)
+
+	def prefix_sums(self, terms):
+		return [write.prefix_sum(terms, i + 1) for i in range(0, write.term_count(terms))]
 
 	def test_fill_totals(self):
-		terms = copy.deepcopy(example_terms)
+		terms = example_terms()
 		target = 1024
-		expected = copy.deepcopy(terms)
-		expected[0]['sum'] = target
-		expected[1]['sum'] = 2 * target
-		expected[2]['sum'] = 3 * target
-		expected[3]['sum'] = 4 * target
-		t = copy.deepcopy(terms)
+		t = make_terms(term_rows(terms))
 		write.fill_totals(t, target)
-		self.assertEqual(t, expected)
+		self.assertEqual(self.prefix_sums(t),
+			[target, 2 * target, 3 * target, 4 * target])
+		self.assertEqual(write.total_sum(t), 4 * target)
 
-		terms[3]['score'] = 30
-		expected[3]['score'] = terms[3]['score']
-		expected[3]['sum'] = expected[3]['sum'] - 30
-		t = copy.deepcopy(terms)
+		terms['score'][3] = 30
+		t = make_terms(term_rows(terms))
 		write.fill_totals(t, target)
-		self.assertEqual(t, expected)
-
-		terms[0]['score'] = 7
-		terms[1]['score'] = 800
-		terms[2]['score'] = 2099
-		terms[3]['score'] = 87
+		self.assertEqual(self.prefix_sums(t),
+			[target, 2 * target, 3 * target, 4 * target - 30])
+		self.assertEqual(t['score'][3], 30)
 
-		expected[0]['score'] = 7
-		expected[1]['score'] = 800
-		expected[2]['score'] = 2099
-		expected[3]['score'] = 87
+		terms['score'][0] = 7
+		terms['score'][1] = 800
+		terms['score'][2] = 2099
+		terms['score'][3] = 87
 
-		expected[0]['sum'] = target - 7
-		expected[1]['sum'] = 2*target - 807
-		expected[2]['sum'] = expected[1]['sum']
-		expected[3]['sum'] = 3 * target - 894
-
-		t = copy.deepcopy(terms)
+		t = make_terms(term_rows(terms))
 		write.fill_totals(t, target)
-		self.assertEqual(t, expected)
+		self.assertEqual(self.prefix_sums(t),
+			[target - 7, 2*target - 807, 2*target - 807, 3 * target - 894])
+		self.assertEqual(list(t['score']), [7, 800, 2099, 87])
+
+		terms = make_terms([{'target': str(i), 'def': str(i), 'score': i, 'last': 0}
+			for i in range(0, 13)])
+		write.fill_totals(terms, 10)
+		self.assertEqual(self.prefix_sums(terms),
+			[10, 19, 27, 34, 40, 45, 49, 52, 54, 55, 55, 55, 55])
 
 	def test_inc_term_score(self):
-		terms = copy.deepcopy(example_terms)
-		terms[0]['sum'] = 100
-		terms[1]['sum'] = 200
-		terms[2]['sum'] = 300
-		terms[3]['sum'] = 400
+		terms = example_terms()
+		write.fill_totals(terms, 100)
+		self.assertEqual(self.prefix_sums(terms), [100, 200, 300, 400])
 
 		write.inc_term_score(terms, 3, 100, 1, 730120)
-		self.assertEqual(terms,
-			[{'target': 'a', 'def': 'b', 'score': 0, 'sum': 100, 'last': 0},
-			{'target': 'a2', 'def': 'b2', 'score': 0, 'sum': 200, 'last': 0},
-			{'target': 'a3', 'def': 'b3', 'score': 0, 'sum': 300, 'last': 0},
-			{'target': 'a4', 'def': 'b4', 'score': 1, 'sum': 399, 'last': 730120}])
+		self.assertEqual(self.prefix_sums(terms), [100, 200, 300, 399])
+		self.assertEqual(terms['score'][3], 1)
+		self.assertEqual(terms['last'][3], 730120)
 
 		write.inc_term_score(terms, 0, 100, 1, 730123)
-		self.assertEqual(terms,
-			[{'target': 'a', 'def': 'b', 'score': 1, 'sum': 99, 'last': 730123},
-			{'target': 'a2', 'def': 'b2', 'score': 0, 'sum': 199, 'last': 0},
-			{'target': 'a3', 'def': 'b3', 'score': 0, 'sum': 299, 'last': 0},
-			{'target': 'a4', 'def': 'b4', 'score': 1, 'sum': 398, 'last': 730120}])
+		self.assertEqual(self.prefix_sums(terms), [99, 199, 299, 398])
+		self.assertEqual(terms['score'][0], 1)
+		self.assertEqual(terms['last'][0], 730123)
+
+		write.inc_term_score(terms, 1, 100, 150, 730124)
+		self.assertEqual(self.prefix_sums(terms), [99, 99, 199, 298])
+		write.inc_term_score(terms, 1, 100, 1, 730125)
+		self.assertEqual(self.prefix_sums(terms), [99, 99, 199, 298])
+		self.assertEqual(terms['score'][1], 151)
+		self.assertEqual(terms['last'][1], 730125)
 
 	@patch('os.path.isfile')
 	def test_readlog(self, mock_isfile):
 		mock_isfile.return_value = True
-		with patch("builtins.open", mock_open(read_data="id\t33\n")) as mock_file:
-			terms = copy.deepcopy(example_terms)
+		with patch("builtins.open", mock_open(read_data=b"id\t33\n")) as mock_file:
+			terms = example_terms()
 			with self.assertRaises(Exception) as err:
 				write.readlog("any", terms, 99)
 			self.assertEqual(str(err.exception), 'log does not match')
-			mock_file.assert_called_with("any", newline='')
-			self.assertEqual(terms, example_terms)
-		with patch("builtins.open", mock_open(read_data="id\t3\n")) as mock_file:
-			terms = copy.deepcopy(example_terms)
+			mock_file.assert_called_with("any", 'rb')
+			self.assertEqual(term_rows(terms), example_rows)
+		with patch("builtins.open", mock_open(read_data=b"id\t3\n")) as mock_file:
+			terms = example_terms()
 			write.readlog("any", terms, 3)
-			mock_file.assert_called_with("any", newline='')
-			self.assertEqual(terms, example_terms)
-		log = "id\t3\n1\t1\t730120\n0\t1\t730120\n1\t1\t730121\n2\t2\t730121\n"
+			mock_file.assert_called_with("any", 'rb')
+			self.assertEqual(term_rows(terms), example_rows)
+		log = b"id\t3\n1\t1\t730120\n0\t1\t730120\n1\t1\t730121\n2\t2\t730121\n"
 		with patch("builtins.open", mock_open(read_data=log)) as mock_file:
-			terms = copy.deepcopy(example_terms)
+			terms = example_terms()
 			write.readlog("any", terms, 3)
-			mock_file.assert_called_with("any", newline='')
-			self.assertEqual(terms,
+			mock_file.assert_called_with("any", 'rb')
+			self.assertEqual(term_rows(terms),
 				[{'target': 'a', 'def': 'b', 'score': 1, 'last': 730120},
 				{'target': 'a2', 'def': 'b2', 'score': 2, 'last': 730121},
 				{'target': 'a3', 'def': 'b3', 'score': 2, 'last': 730121},
 				{'target': 'a4', 'def': 'b4', 'score': 0, 'last': 0}])
 
+	def test_readlog_checkpointed(self):
+		with tempfile.TemporaryDirectory() as dir:
+			logpath = os.path.join(dir, 'deck.log')
+			with open(logpath, 'w') as log:
+				log.write('id\t3\n1\t1\t730120\n0\t1\t730120\n')
+			terms = example_terms()
+			write.readlog_checkpointed(logpath, terms, 3)
+			self.assertTrue(os.path.isfile(write.checkpoint_path(logpath)))
+			self.assertEqual(list(terms['score']), [1, 1, 0, 0])
+
+			with open(logpath, 'a') as log:
+				log.write('id\t3\n1\t1\t730121\n2\t2\t730121\n')
+			terms = example_terms()
+			write.readlog_checkpointed(logpath, terms, 3)
+			self.assertEqual(term_rows(terms),
+				[{'target': 'a', 'def': 'b', 'score': 1, 'last': 730120},
+				{'target': 'a2', 'def': 'b2', 'score': 2, 'last': 730121},
+				{'target': 'a3', 'def': 'b3', 'score': 2, 'last': 730121},
+				{'target': 'a4', 'def': 'b4', 'score': 0, 'last': 0}])
+
+			digest = write.keys_digest(terms)
+			ckpt = write.read_checkpoint(write.checkpoint_path(logpath), 3, 4,
+					logpath, digest)
+			self.assertEqual(ckpt[2], os.path.getsize(logpath))
+			self.assertIsNone(write.read_checkpoint(write.checkpoint_path(logpath),
+				4, 4, logpath, digest))
+			self.assertIsNone(write.read_checkpoint(write.checkpoint_path(logpath),
+				3, 5, logpath, digest))
+			reordered = make_terms(example_rows[::-1])
+			self.assertIsNone(write.read_checkpoint(write.checkpoint_path(logpath),
+				3, 4, logpath, write.keys_digest(reordered)))
+
+			# A log restored from elsewhere that grew past the offset
+			with open(logpath, 'w') as log:
+				log.write('id\t3\n3\t1\t730122\n0\t1\t730122\n'
+					+ 'id\t3\n3\t1\t730123\n2\t1\t730123\n1\t1\t730123\n')
+			self.assertGreater(os.path.getsize(logpath), ckpt[2])
+			self.assertIsNone(write.read_checkpoint(write.checkpoint_path(logpath),
+				3, 4, logpath, digest))
+			terms = example_terms()
+			write.readlog_checkpointed(logpath, terms, 3)
+			self.assertEqual(list(terms['score']), [1, 1, 1, 2])
+
+	def test_merge_deck(self):
+		with tempfile.TemporaryDirectory() as dir:
+			path = os.path.join(dir, 'deck.csv')
+			with open(path, 'w') as deck:
+				deck.write('# comment\nid\t3\na\tb\na2\tb2\t5\t730100\n'
+					+ '\na3\tb3\na4\tb4\n')
+			logpath = path + '.log'
+			with open(logpath, 'w') as log:
+				log.write('id\t3\n1\t1\t730120\n2\t2\t730121\n')
+			self.assertEqual(write.merge_deck(read_args(path), logpath), 4)
+			with open(path) as deck:
+				self.assertEqual(deck.read(), '# comment\nid\t4\na\tb\n'
+					+ 'a2\tb2\t6\t730120\n\na3\tb3\t2\t730121\na4\tb4\n')
+			self.assertFalse(os.path.isfile(path + '.tmp'))
+
+			with open(logpath, 'w') as log:
+				log.write('id\t4\n')
+				log.write(write.log_record(write.term_key('a4', 'b4'), 3,
+					730122, False).decode())
+			self.assertEqual(write.merge_deck(read_args(path), logpath), 5)
+			self.assertEqual(write.read_terms(read_args(path))[1]['score'][3], 3)
+
+			with open(logpath, 'w') as log:
+				log.write('id\t5\n4\t1\t730120\n')
+			with self.assertRaises(Exception):
+				write.merge_deck(read_args(path), logpath)
+			self.assertEqual(write.read_terms(read_args(path))[0], 5)
+
+			with open(logpath, 'w') as log:
+				log.write('id\t5\n')
+				log.write(write.log_record(write.term_key('a4', 'old b4'), 3,
+					730122, False).decode())
+			with self.assertRaises(Exception) as err:
+				write.merge_deck(read_args(path), logpath)
+			self.assertEqual(str(err.exception), 'log does not match')
+			self.assertEqual(write.read_terms(read_args(path))[0], 5)
+			self.assertFalse(os.path.isfile(path + '.tmp'))
+
+	def test_merge_all(self):
+		with tempfile.TemporaryDirectory() as dir:
+			for name, log_id in (('good.csv', 3), ('bad.csv', 2)):
+				path = os.path.join(dir, name)
+				with open(path, 'w') as deck:
+					deck.write('id\t3\na\tb\n')
+				with open(path + '.log', 'w') as log:
+					log.write('id\t%d\n0\t1\t730120\n' % log_id)
+			with open(os.path.join(dir, 'nolog.csv'), 'w') as deck:
+				deck.write('id\t3\na\tb\n')
+			self.assertEqual(write.deck_paths(dir),
+				[os.path.join(dir, 'bad.csv'), os.path.join(dir, 'good.csv')])
+			with patch('sys.stderr'), patch('builtins.print'):
+				self.assertEqual(write.merge_all(read_args(None), dir), 1)
+			self.assertEqual(write.read_terms(
+				read_args(os.path.join(dir, 'good.csv')))[0], 4)
+			self.assertEqual(write.read_terms(
+				read_args(os.path.join(dir, 'bad.csv')))[0], 3)
+
+	def test_binary_log(self):
+		with tempfile.TemporaryDirectory() as dir:
+			logpath = os.path.join(dir, 'deck.log')
+			with open(logpath, 'w') as log:
+				log.write('id\t3\n1\t1\t730120\n0\t1\t730120\n'
+					+ 'id\t3\n1\t1\t730121\n2\t2\t730121\n')
+			expected = example_terms()
+			write.readlog(logpath, expected, 3)
+			self.assertFalse(write.is_binary_log(logpath))
+			ends = [end for end, _ in write.log_chunks(logpath, 4)]
+			self.assertEqual(ends, [32, os.path.getsize(logpath)])
+			chunks = [chunk for _, chunk in write.log_chunks(logpath, 4)]
+			self.assertEqual([len(chunk[1]) for chunk in chunks], [4, 2])
+			self.assertEqual(chunks[0], [[True, False, False, True],
+				[-1, 1, 0, -1], [3, 1, 1, 3], [0, 730120, 730120, 0],
+				[0, 0, 0, 0]])
+			write.convert_log(logpath, expected)
+			self.assertTrue(write.is_binary_log(logpath))
+			self.assertEqual(os.path.getsize(logpath), 7 * 20)
+			records = [record for _, chunk in write.log_chunks(logpath, 4)
+				for record in zip(*chunk)]
+			self.assertEqual(records, [(True, term if keyed or term == -1
+				else expected['key'][term], delta, day, latency)
+				for chunk in chunks
+				for keyed, term, delta, day, latency in zip(*chunk)])
+			terms = example_terms()
+			write.readlog(logpath, terms, 3)
+			self.assertEqual(term_rows(terms), term_rows(expected))
+			with self.assertRaises(Exception) as err:
+				write.readlog(logpath, example_terms(), 4)
+			self.assertEqual(str(err.exception), 'log does not match')
+
+			terms = example_terms()
+			write.readlog_checkpointed(logpath, terms, 3)
+			with open(logpath, 'ab') as log:
+				log.write(write.binary_log_session(3))
+				log.write(write.binary_log_record.pack(terms['key'][3], 5, 730122, 0))
+				log.write(b'\0\0')
+			terms = example_terms()
+			write.readlog_checkpointed(logpath, terms, 3)
+			self.assertEqual(list(terms['score']), [1, 2, 2, 5])
+			self.assertEqual(list(terms['last']), [730120, 730121, 730121, 730122])
+
+	def test_old_binary_logs(self):
+		records = [(-1, 3, 0), (2, 1, 730120), (1, 2, 730121)]
+		keys = {-1: -1, 2: 0x7edcba9876543210, 1: -5}
+		with tempfile.TemporaryDirectory() as dir:
+			logpath = os.path.join(dir, 'deck.log')
+			for version in (1, 2):
+				record = write.binary_log_records[version]
+				with open(logpath, 'wb') as log:
+					log.write(write.binary_log_header.pack(write.binary_log_magic,
+						version, 0).ljust(record.size, b'\0'))
+					for term, delta, day in records:
+						if version > 1:
+							term = keys[term]
+						log.write(record.pack(term, delta, day))
+				chunks = [chunk for _, chunk in write.log_chunks(logpath, 2)]
+				self.assertEqual([chunk[1] for chunk in chunks],
+					[[-1, 2], [1]] if version == 1
+					else [[-1, 0x7edcba9876543210], [-5]])
+				self.assertEqual([chunk[0] for chunk in chunks],
+					[[True, version > 1], [version > 1]])
+				self.assertEqual([chunk[2:] for chunk in chunks],
+					[[[3, 1], [0, 730120], [0, 0]], [[2], [730121], [0]]])
+				if version == 1:
+					terms = example_terms()
+					write.convert_log(logpath, terms)
+					self.assertEqual(os.path.getsize(logpath), 4 * 20)
+					write.readlog(logpath, terms, 3)
+					self.assertEqual(list(terms['score']), [0, 2, 1, 0])
+
 	def test_find_term_index(self):
-		terms = copy.deepcopy(example_terms)
-		terms[0]['score'] = 50
-		terms[0]['sum'] = 50
-		terms[1]['score'] = 50
-		terms[1]['sum'] = 100
-		terms[2]['score'] = 50
-		terms[2]['sum'] = 150
-		terms[3]['score'] = 50
-		terms[3]['sum'] = 200
+		terms = example_terms()
+		write.fill_totals(terms, 50)
 		self.assertEqual(write.find_term_index(terms, 1), 0)
 		self.assertEqual(write.find_term_index(terms, 2), 0)
 		self.assertEqual(write.find_term_index(terms, 50), 0)
@@ -180,9 +356,182 @@ class test_term_reading(unittest.TestCase):
 		self.assertEqual(write.find_term_index(terms, 150), 2)
 		self.assertEqual(write.find_term_index(terms, 151), 3)
 		self.assertEqual(write.find_term_index(terms, 200), 3)
-		terms[0]['score'] = 100
-		terms[0]['sum'] = 0
+		write.inc_term_score(terms, 0, 50, 100, 730120)
 		self.assertEqual(write.find_term_index(terms, 1), 1)
+		write.inc_term_score(terms, 2, 50, 50, 730120)
+		self.assertEqual(write.find_term_index(terms, 51), 3)
+		self.assertEqual(write.find_term_index(terms, 100), 3)
+
+	def test_grade_batch(self):
+		terms = example_terms()
+		write.fill_totals(terms, 100)
+		records = [(1, 'a2', 730120), (2, 'x', 730120), (2, 'a3', 730120),
+			(2, 'A3', 730121), (0, 'b', 730121)]
+		with tempfile.TemporaryDirectory() as dir:
+			logpath = os.path.join(dir, 'deck.log')
+			with write.LogWriter(logpath, False, 100) as log:
+				results = list(write.grade_batch(terms, 100, records, log))
+			with open(logpath, 'rb') as log:
+				self.assertEqual(log.read(),
+					write.log_record(terms['key'][1], 1, 730120, False)
+					+ write.log_record(terms['key'][2], 1, 730121, False))
+		self.assertEqual(results, [(1, True, 1), (2, False, None),
+			(2, True, None), (2, True, 1), (0, False, None)])
+		self.assertEqual(list(terms['score']), [0, 1, 1, 0])
+		self.assertEqual(self.prefix_sums(terms), [100, 199, 298, 398])
+
+		records = [(3, 'a5', 730122), (3, 'a4', 730122), (1, 'ą2', 730122)]
+		with tempfile.TemporaryDirectory() as dir:
+			with write.LogWriter(os.path.join(dir, 'deck.log'), False) as log:
+				results = list(write.grade_batch(terms, 100, records, log, 1))
+		self.assertEqual(results, [(3, match.NEAR, None), (3, match.EXACT, 1),
+			(1, match.NEAR, 0)])
+		self.assertEqual(list(terms['score']), [0, 1, 1, 1])
+
+	def test_flush_every(self):
+		with tempfile.TemporaryDirectory() as dir:
+			logpath = os.path.join(dir, 'deck.log')
+			batchpath = os.path.join(dir, 'batch')
+			with open(batchpath, 'w') as batch:
+				batch.write('')
+			everies = []
+			open_log_real = write.open_log
+			def open_log(logpath, args):
+				log = open_log_real(logpath, args)
+				everies.append(log.every)
+				return log
+			with patch('write.open_log', open_log), patch('sys.stdout'), \
+					patch('sys.stderr'):
+				for argv in [[], ['-n', '1'], ['-n', '7']]:
+					args = write.parser.parse_args(['-g', batchpath] + argv)
+					write.run_batch(args, example_terms(), logpath, 3)
+				with write.open_log(logpath,
+						write.parser.parse_args([])) as log:
+					pass
+		self.assertEqual(everies, [4096, 1, 7, 1])
+
+	def test_log_writer(self):
+		keys = example_terms()['key']
+		with tempfile.TemporaryDirectory() as dir:
+			logpath = os.path.join(dir, 'deck.log')
+			with write.LogWriter(logpath, False, 2) as log:
+				log.session(3)
+				log.write(keys[1], 1, 730120)
+				self.assertEqual(os.path.getsize(logpath), 0)
+				log.write(keys[0], 1, 730120)
+				size = len(b'id\t3\n'
+					+ write.log_record(keys[1], 1, 730120, False)
+					+ write.log_record(keys[0], 1, 730120, False))
+				self.assertEqual(os.path.getsize(logpath), size)
+				log.write(keys[2], 2, 730121)
+			size = size + len(write.log_record(keys[2], 2, 730121, False))
+			with open(logpath, 'ab') as log:
+				log.write(b'0x3\t1\t73')
+			terms = example_terms()
+			write.readlog_checkpointed(logpath, terms, 3)
+			self.assertEqual(list(terms['score']), [1, 1, 2, 0])
+			self.assertEqual(write.read_checkpoint(write.checkpoint_path(logpath),
+				3, 4, logpath, write.keys_digest(terms))[2], size)
+			with write.LogWriter(logpath, False, 1, 0, True) as log:
+				self.assertEqual(os.path.getsize(logpath), size)
+				log.session(3)
+				log.write(keys[3], 1, 730122)
+			terms = example_terms()
+			write.readlog_checkpointed(logpath, terms, 3)
+			self.assertEqual(list(terms['score']), [1, 1, 2, 1])
+			with write.LogWriter(logpath, False, 1) as log:
+				log.write(12345, 1, 730122)
+			with self.assertRaises(Exception) as err:
+				write.readlog(logpath, example_terms(), 3)
+			self.assertEqual(str(err.exception), 'log does not match')
+
+			binpath = os.path.join(dir, 'deck.blog')
+			with write.LogWriter(binpath, True, 1) as log:
+				log.session(3)
+				log.write(keys[1], 1, 730120)
+			with open(binpath, 'ab') as log:
+				log.write(b'\1\2\3')
+			write.recover_log(binpath, True)
+			self.assertEqual(os.path.getsize(binpath), 60)
+
+	def test_term_keys(self):
+		terms = make_terms(example_rows[::-1])
+		self.assertEqual(write.find_term(terms, 'a', 'b'), 3)
+		self.assertIsNone(write.find_term(terms, 'a', 'b2'))
+		write.add_term(terms, 'a', 'b2', 0, 0)
+		with self.assertRaises(Exception) as err:
+			write.add_term(terms, 'a2', 'b2', 0, 0)
+		self.assertEqual(str(err.exception), 'duplicate term: a2')
+		with tempfile.TemporaryDirectory() as dir:
+			logpath = os.path.join(dir, 'deck.log')
+			with open(logpath, 'w') as log:
+				log.write('id\t3\n0\t1\t730120\n')
+			with write.LogWriter(logpath, False) as log:
+				log.write(example_terms()['key'][1], 2, 730121)
+			write.readlog(logpath, terms, 3)
+			self.assertEqual(list(terms['score']), [1, 0, 2, 0, 0])
+
+	def test_due_scheduler(self):
+		terms = make_terms([{'target': 'a', 'def': 'b', 'score': 0, 'last': 0},
+			{'target': 'a2', 'def': 'b2', 'score': 80, 'last': 730111},
+			{'target': 'a3', 'def': 'b3', 'score': 16, 'last': 730117},
+			{'target': 'a4', 'def': 'b4', 'score': 100, 'last': 730100}])
+		scheduler = write.DueScheduler(terms, 100, today=730120)
+		self.assertEqual(scheduler.pick(), 0)
+		self.assertIsNone(scheduler.answered(0, False, 730120))
+		self.assertEqual(scheduler.pick(), 2)
+		self.assertEqual(scheduler.answered(2, True, 730120), 12)
+		self.assertIsNone(scheduler.pick())
+		scheduler.today = 730121
+		self.assertEqual(scheduler.pick(), 0)
+		self.assertEqual(scheduler.answered(0, True, 730121), 1)
+		self.assertEqual(scheduler.pick(), 1)
+		self.assertEqual(scheduler.answered(1, True, 730121), 40)
+		self.assertIsNone(scheduler.pick())
+		scheduler.today = 730123
+		self.assertEqual(scheduler.pick(), 0)
+		self.assertEqual(scheduler.answered(0, True, 730123), 8)
+		self.assertEqual(scheduler.pick(), 2)
+		self.assertEqual(scheduler.answered(2, True, 730123), 12)
+		self.assertIsNone(scheduler.pick())
+		self.assertEqual(list(scheduler.due), [730124, -1, 730128, -1])
+
+	def test_review_loop(self):
+		terms = make_terms([{'target': 'żółw', 'def': 'turtle', 'score': 0,
+			'last': 0}])
+		events = []
+		responses = iter(['zolw', ''])
+		def input(prompt=''):
+			events.append('input')
+			return next(responses)
+		with tempfile.TemporaryDirectory() as dir:
+			with write.LogWriter(os.path.join(dir, 'deck.log'), False) as log:
+				with self.assertRaises(StopIteration):
+					write.review_loop(write.ScoreScheduler(terms, 100), log, 3,
+						input, events.append, 0)
+		self.assertEqual(events, ['\x1b[2J\x1b[H', 'turtle', 'input',
+			'Almost: żółw', 'input', '\x1b[2J\x1b[H', 'turtle', 'input'])
+
+	def test_slow_delta(self):
+		self.assertEqual(write.slow_delta(84, 9000, 0), 84)
+		self.assertEqual(write.slow_delta(84, 1500, 2000), 84)
+		self.assertEqual(write.slow_delta(84, 4000, 2000), 42)
+		self.assertEqual(write.slow_delta(1, 9000, 1000), 1)
+		terms = example_terms()
+		write.fill_totals(terms, 100)
+		with tempfile.TemporaryDirectory() as dir:
+			logpath = os.path.join(dir, 'deck.log')
+			with write.LogWriter(logpath, False) as log:
+				log.session(3)
+				self.assertEqual(list(write.grade_batch(terms, 100,
+					[(2, 'a3', 730120, 2500), (2, 'a3', 730130, 6000)], log, None, 3000)),
+					[(2, match.EXACT, 1), (2, match.EXACT, 20)])
+			with open(logpath) as log:
+				self.assertEqual(log.read().splitlines()[2].split('\t')[1:],
+					['20', '730130', '6000'])
+			terms = example_terms()
+			write.readlog(logpath, terms, 3)
+			self.assertEqual(list(terms['score']), [0, 0, 21, 0])
 
 	def test_match_response(self):
 		self.assertTrue(write.match_response('a', 'a'))
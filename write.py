@@ -28,15 +28,85 @@ import sys
 import argparse
 import csv
 import random
+import os
 import os.path
+import struct
+import hashlib
+import mmap
+import threading
+import time
+import heapq
+from array import array
+from itertools import accumulate
+from multiprocessing import Pool
+from collections import defaultdict
 from datetime import datetime
+import metrics
+import match
+
+# Terms are stored column-wise: the strings in plain lists, the numbers in
+# compact arrays, all indexed by the position of the term in the CSV.
+#
+# Each term also has a stable key, a 63 bit hash of its target and
+# definition, which the log refers to the term by. The 'index' dict maps
+# the keys to positions, so the CSV rows can be inserted or reordered
+# between sessions. The 'answer' list holds the targets normalized for
+# matching responses, see match.py.
+#
+# The 'sum' column forms a binary indexed tree over the remaining weights
+# (target - score) of the terms: terms['sum'][i] holds the total weight of
+# the terms in the index range (i - lowbit(i + 1), i].
+
+def new_terms():
+	return {'target': [], 'def': [], 'answer': [], 'key': array('q'), 'index': {},
+		'score': array('q'), 'last': array('i'), 'sum': array('q')}
+
+def term_count(terms):
+	return len(terms['target'])
+
+def copy_terms(terms):
+	return {'target': terms['target'], 'def': terms['def'],
+		'answer': terms['answer'], 'key': terms['key'], 'index': terms['index'],
+		'score': array('q', terms['score']), 'last': array('i', terms['last']),
+		'sum': array('q', terms['sum'])}
+
+def term_key(target, definition):
+	digest = hashlib.blake2b((target + '\t' + definition).encode(),
+			digest_size=8).digest()
+	return int.from_bytes(digest, 'little') >> 1
+
+def add_term(terms, target, definition, score, last):
+	key = term_key(target, definition)
+	if key in terms['index']:
+		other = terms['index'][key]
+		if terms['target'][other] == target and terms['def'][other] == definition:
+			raise Exception('duplicate term: ' + target)
+		raise Exception('term key collision: ' + target)
+	terms['index'][key] = term_count(terms)
+	terms['target'].append(target)
+	terms['def'].append(definition)
+	terms['answer'].append(match.answer_key(target))
+	terms['key'].append(key)
+	terms['score'].append(score)
+	terms['last'].append(last)
+
+def find_term(terms, target, definition):
+	return terms['index'].get(term_key(target, definition))
+
+def prefix_sum(terms, count):
+	tree = terms['sum']
+	total = 0
+	while count > 0:
+		total = total + tree[count - 1]
+		count = count - (count & -count)
+	return total
 
 def total_sum(terms):
-	return terms[-1]['sum']
+	return prefix_sum(terms, term_count(terms))
 
 def read_terms(args):
 	id = 0
-	terms = []
+	terms = new_terms()
 	with open(args.path, newline='') as csvfile:
 		datareader = csv.reader(csvfile, delimiter='\t', quotechar='|')
 		first = True
@@ -55,175 +125,853 @@ def read_terms(args):
 				assert(id > 0)
 				continue
 			assert len(row) == 2 or len(row) == 4
-			if row[0] in terms:
-				print('Duplicate definition: ' + row[0])
-				sys.exit(1)
-			score = 0
-			time = 0
-			if (row_number < args.start) or (args.end > 0 and row_number > args.end):
-				score = args.target_count
-			elif len(row) == 4:
-				score = int(row[2])
-				time = int(row[3])
-			term = {'target': row[0], 'def': row[1], 'score': score, 'last': time}
-			terms.append(term)
+			score, time = row_score(args, row_number, row)
+			add_term(terms, row[0], row[1], score, time)
 	assert(id > 0)
 	return id, terms
 
+# The score and last day of a CSV row, rows outside of the -s/-e range
+# count as done
+def row_score(args, row_number, row):
+	if (row_number < args.start) or (args.end > 0 and row_number > args.end):
+		return args.target_count, 0
+	elif len(row) == 4:
+		return int(row[2]), int(row[3])
+	return 0, 0
+
+def read_deck_id(path):
+	with open(path, newline='') as csvfile:
+		datareader = csv.reader(csvfile, delimiter='\t', quotechar='|')
+		for row in datareader:
+			if len(row) == 0 or row[0].startswith('#'):
+				continue
+			assert len(row) == 2
+			assert row[0] == 'id'
+			return int(row[1])
+	assert False, 'no id in ' + path
+
+def term_weight(score, target):
+	if score < target:
+		return target - score
+	return 0
+
 def fill_totals(terms, target):
-	total = 0
-	for i in range(0, len(terms)):
-		if terms[i]['score'] < target:
-			total = total + target - terms[i]['score']
-		terms[i]['sum'] = total
+	prefix = array('q', [0])
+	prefix.extend(accumulate(target - s if s < target else 0
+				for s in terms['score']))
+	terms['sum'] = array('q', (prefix[i] - prefix[i - (i & -i)]
+				for i in range(1, len(prefix))))
 
-def compute_term_delta(term, day):
-	if term['last'] == 0:
+# A first time right answer earns delta_factor for each day since the
+# term was last answered, up to delta_cap
+delta_factor = 4
+delta_cap = 84
+
+def compute_term_delta(last, day, factor=delta_factor, cap=delta_cap):
+	if last == 0:
 		return 1
-	assert(term['last'] <= day)
-	d = day - term['last']
+	assert(last <= day)
+	d = day - last
 	if d == 0:
 		return 1
-	d = d * 4
-	if d > 84:
-		d = 84
+	d = d * factor
+	if d > cap:
+		d = cap
 	return d;
 
-def readlog(logpath, terms, id):
-	if not os.path.isfile(logpath):
+# The binary log starts with a header padded to the size of a record, and
+# continues with fixed width (term, delta, day) records of native
+# integers. Version 1 records refer to terms by their int32 position,
+# version 2 records by their int64 key, version 3 records add the
+# response time in milliseconds. Records with the term -1 start a
+# session, holding the deck id in place of the delta.
+binary_log_magic = b'PLWB'
+binary_log_header = struct.Struct('=4sII')
+binary_log_records = {1: struct.Struct('=iii'), 2: struct.Struct('=qii'),
+	3: struct.Struct('=qiiI')}
+binary_log_version = 3
+binary_log_record = binary_log_records[binary_log_version]
+
+def is_binary_log(logpath):
+	with open(logpath, 'rb') as log:
+		return log.read(len(binary_log_magic)) == binary_log_magic
+
+def binary_log_version_of(logpath):
+	with open(logpath, 'rb') as log:
+		magic, version, _ = binary_log_header.unpack(
+				log.read(binary_log_header.size))
+	assert magic == binary_log_magic and version in binary_log_records
+	return version
+
+def binary_log_start():
+	return binary_log_header.pack(binary_log_magic,
+			binary_log_version, 0).ljust(binary_log_record.size, b'\0')
+
+def binary_log_session(id):
+	return binary_log_record.pack(-1, id, 0, 0)
+
+# In the text log, a term written as a hex number starting with 0x is
+# a key, a decimal number is the position of the term in the CSV.
+def parse_log_term(field):
+	if field.startswith('0x'):
+		return True, int(field, 16)
+	return False, int(field)
+
+# Finds where the replayed deltas go: the position of a term in a deck
+# with the given keys index. Without an index, the deltas of keyed terms
+# are collected under the key, those of positional terms under
+# -1 - position. A key that is not in the deck, e.g. after the term was
+# edited, fails as a position past the end does, rather than dropping the
+# progress of the term.
+def log_slot(keyed, term, keys, count):
+	if keys is None:
+		if keyed:
+			return term
+		return -1 - term
+	if keyed:
+		if term not in keys:
+			raise Exception('log does not match')
+		return keys[term]
+	assert(term >= 0 and term < count)
+	return term
+
+# Reads a text or binary log of any version in chunks of up to size
+# records, from the byte offset start, so only one chunk is held in
+# memory at a time. Yields (offset, chunk) pairs, where offset is the end
+# of the chunk, and the chunk is a list of five columns, the keyed, term,
+# delta, day and latency lists of its records. A session record has the
+# term -1 and the deck id as its delta, and the latency is 0 when it was
+# not logged. A torn last record, left behind by a crash, is left out.
+def log_chunks(logpath, size=4096, start=0):
+	if not is_binary_log(logpath):
+		yield from text_log_chunks(logpath, size, start)
 		return
-	with open(logpath, newline='') as log:
-		datareader = csv.reader(log, delimiter='\t')
-		first = True
-		for row in datareader:
-			if first:
-				first = False
+	with open(logpath, 'rb') as log:
+		magic, version, _ = binary_log_header.unpack(
+				log.read(binary_log_header.size))
+		assert magic == binary_log_magic and version in binary_log_records
+		record = binary_log_records[version]
+		if start == 0:
+			start = record.size
+		count = (os.fstat(log.fileno()).st_size - start) // record.size
+		if count <= 0:
+			return
+		keyed = version > 1
+		step = size * record.size
+		end = start + count * record.size
+		with mmap.mmap(log.fileno(), end, access=mmap.ACCESS_READ) as mm:
+			for offset in range(start, end, step):
+				chunk_end = min(end, offset + step)
+				with memoryview(mm)[offset:chunk_end] as view:
+					chunk = binary_log_columns(view, record.format[1:])
+				n = len(chunk[0])
+				if len(chunk) == 3:
+					chunk.append([0] * n)
+				if keyed:
+					keyeds = [True] * n
+				else:
+					keyeds = [term == -1 for term in chunk[0]]
+				yield chunk_end, [keyeds] + chunk
+
+# Decodes the records of a binary log a column at a time, with strided
+# slices of the 32-bit words of the records. The int64 terms are put
+# together from their two words.
+def binary_log_columns(view, format):
+	width = struct.calcsize('=' + format) // 4
+	columns = []
+	with view.cast('I') as words, view.cast('i') as signed:
+		n = len(words) // width
+		pos = 0
+		for code in format:
+			if code == 'q':
+				terms = array('q', bytes(n * 8))
+				with memoryview(terms).cast('B').cast('I') as halves:
+					halves[0::2] = words[pos::width]
+					halves[1::2] = words[pos + 1::width]
+				columns.append(terms.tolist())
+				pos = pos + 2
+			elif code == 'i':
+				columns.append(signed[pos::width].tolist())
+				pos = pos + 1
+			else:
+				columns.append(words[pos::width].tolist())
+				pos = pos + 1
+	return columns
+
+# A text log starts with the id line of its first session
+def text_log_chunks(logpath, size, start):
+	records = []
+	with open(logpath, 'rb') as log:
+		log.seek(start)
+		offset = start
+		for line in log:
+			if not line.endswith(b'\n'):
+				break
+			row = line.decode().rstrip('\r\n').split('\t')
+			if row[0] == 'id':
 				assert len(row) == 2
-				assert row[0] == 'id'
-				if str(id) != row[1]:
-					raise Exception('log does not match')
-				continue
-			if len(row) == 2 and row[0] == 'id':
-				if str(id) != row[1]:
+				records.append((True, -1, int(row[1]), 0, 0))
+			elif offset == 0:
+				raise Exception('log does not match')
+			else:
+				assert(len(row) == 3 or len(row) == 4)
+				keyed, term = parse_log_term(row[0])
+				latency = 0
+				if len(row) == 4:
+					latency = int(row[3])
+				records.append((keyed, term, int(row[1]), int(row[2]), latency))
+			offset = offset + len(line)
+			if len(records) == size:
+				yield offset, [list(column) for column in zip(*records)]
+				records = []
+	if len(records) > 0:
+		yield offset, [list(column) for column in zip(*records)]
+
+# Rewrites a text or older binary log in the current binary format,
+# turning the positions into the keys of the terms
+def convert_log(logpath, terms):
+	tmp_path = logpath + '.tmp'
+	with open(tmp_path, 'wb') as out:
+		out.write(binary_log_start())
+		for _, chunk in log_chunks(logpath):
+			for keyed, term, delta, day, latency in zip(*chunk):
+				if not keyed:
+					term = terms['key'][term]
+				out.write(binary_log_record.pack(term, delta, day, latency))
+	os.replace(tmp_path, logpath)
+
+# Adds the deltas logged after the byte offset start to the score array,
+# and sets the last array to the day of the latest answer. Keyed records
+# are placed through keys, see log_slot, positional ones are checked
+# against count, the length of the score array by default.
+# Returns the offset of the end of the replayed log.
+def replay_log(logpath, id, score, last, start, count=None, keys=None):
+	if count is None:
+		count = len(score)
+	end = start
+	for end, chunk in log_chunks(logpath, start=start):
+		for keyed, term, delta, day in zip(*chunk[:4]):
+			if term == -1:
+				if delta != id:
 					raise Exception('log does not match')
 				continue
-			assert(len(row) == 3)
-			index = int(row[0])
-			delta = int(row[1])
-			day = int(row[2])
-			assert(index >= 0 and index < len(terms))
 			assert(delta >= 0)
-			terms[index]['score'] = terms[index]['score'] + delta
-			terms[index]['last'] = day
+			slot = log_slot(keyed, term, keys, count)
+			score[slot] = score[slot] + delta
+			last[slot] = day
+	return end
+
+def readlog(logpath, terms, id):
+	if not os.path.isfile(logpath):
+		return
+	replay_log(logpath, id, terms['score'], terms['last'], 0,
+			keys=terms['index'])
+
+# A checkpoint holds the score deltas and last days collected from the
+# first offset bytes of the log, so only the rest needs to be replayed.
+# The deltas are stored by position, the checkpoint is only used with
+# the same terms in the same order, as told by a digest of the keys. The
+# checkpoint also holds a fingerprint of the last bytes it covers, so it
+# is not used with a log that was deleted or restored and grew again past
+# the offset.
+checkpoint_header = struct.Struct('<4sqqq8s8s')
+checkpoint_magic = b'PLC3'
+
+# A digest of the up to 64 bytes before the offset, None if the log is
+# shorter than that
+def log_fingerprint(logpath, offset):
+	start = max(0, offset - 64)
+	with open(logpath, 'rb') as log:
+		log.seek(start)
+		data = log.read(offset - start)
+	if len(data) != offset - start:
+		return None
+	return hashlib.blake2b(data, digest_size=8).digest()
 
+def checkpoint_path(logpath):
+	return logpath + '.ckpt'
+
+def keys_digest(terms):
+	return hashlib.blake2b(terms['key'].tobytes(), digest_size=8).digest()
+
+def read_checkpoint(path, id, count, logpath, digest):
+	deltas = array('q')
+	last = array('i')
+	try:
+		with open(path, 'rb') as f:
+			magic, ckpt_id, offset, ckpt_count, ckpt_digest, fingerprint = \
+					checkpoint_header.unpack(f.read(checkpoint_header.size))
+			if (magic != checkpoint_magic or ckpt_id != id
+				or ckpt_count != count or ckpt_digest != digest
+				or log_fingerprint(logpath, offset) != fingerprint):
+				return None
+			deltas.fromfile(f, count)
+			last.fromfile(f, count)
+	except (OSError, EOFError, struct.error):
+		return None
+	return deltas, last, offset
+
+def write_checkpoint(path, id, offset, deltas, last, digest, fingerprint):
+	tmp_path = path + '.tmp'
+	with open(tmp_path, 'wb') as f:
+		f.write(checkpoint_header.pack(checkpoint_magic, id, offset,
+				len(deltas), digest, fingerprint))
+		deltas.tofile(f)
+		last.tofile(f)
+	os.replace(tmp_path, path)
+
+def readlog_checkpointed(logpath, terms, id):
+	if not os.path.isfile(logpath):
+		return
+	count = term_count(terms)
+	digest = keys_digest(terms)
+	ckpt = read_checkpoint(checkpoint_path(logpath), id, count, logpath,
+			digest)
+	if ckpt is None:
+		ckpt = array('q', [0]) * count, array('i', [0]) * count, 0
+	deltas, last, offset = ckpt
+	end = replay_log(logpath, id, deltas, last, offset, keys=terms['index'])
+	for i in range(0, count):
+		terms['score'][i] = terms['score'][i] + deltas[i]
+		if last[i] != 0:
+			terms['last'][i] = last[i]
+	if end != offset:
+		write_checkpoint(checkpoint_path(logpath), id, end, deltas, last,
+				digest, log_fingerprint(logpath, end))
+
+# Returns the first index where the prefix sum reaches sum
 def find_term_index(terms, sum):
-	left = 0
-	right = len(terms)
-	while terms[left]['sum'] < sum:
-		mid = (left + right) // 2
-		if terms[mid]['sum'] < sum:
-			left = mid + 1
-		else:
-			right = mid
-	return left
+	tree = terms['sum']
+	pos = 0
+	step = 1
+	while step * 2 <= len(tree):
+		step = step * 2
+	while step > 0:
+		if pos + step <= len(tree) and tree[pos + step - 1] < sum:
+			pos = pos + step
+			sum = sum - tree[pos - 1]
+		step = step // 2
+	return pos
 
 def inc_term_score(terms, index, target, delta, day):
-	# TODO: perform this in O(log n)
-	terms[index]['score'] = terms[index]['score'] + delta
-	terms[index]['last'] = day
-	if terms[index]['score'] >= target:
-		if index == 0:
-			delta = terms[index]['sum']
-			terms[index]['sum'] = 0
-		else:
-			delta = terms[index]['sum'] - terms[index - 1]['sum']
-			terms[index]['sum'] = terms[index - 1]['sum']
-	else:
-		terms[index]['sum'] = terms[index]['sum'] - delta
-	index = index + 1
-
-	while index < len(terms):
-		terms[index]['sum'] = terms[index]['sum'] - delta
-		index = index + 1
+	score = terms['score']
+	old_weight = term_weight(score[index], target)
+	score[index] = score[index] + delta
+	terms['last'][index] = day
+	diff = term_weight(score[index], target) - old_weight
+	if diff == 0:
+		return
+	tree = terms['sum']
+	i = index + 1
+	while i <= len(tree):
+		tree[i - 1] = tree[i - 1] + diff
+		i = i + (i & -i)
 
 def match_response(term, response):
-	term_parts = term.split()
-	resp_parts = response.split()
-	if len(term_parts) != len(resp_parts):
+	return match.grade(match.answer_key(term), response) == match.EXACT
+
+# An existing log keeps its format
+def use_binary_log(logpath, binary):
+	if os.path.isfile(logpath) and os.path.getsize(logpath) > 0:
+		return is_binary_log(logpath)
+	return binary
+
+def log_record(key, delta, day, binary, latency=0):
+	if binary:
+		return binary_log_record.pack(key, delta, day, latency)
+	return '0x{:x}\t{}\t{}\t{}\n'.format(key, delta, day, latency).encode()
+
+# Cuts off a partially written last record left behind by a crash
+def recover_log(logpath, binary):
+	if not os.path.isfile(logpath):
+		return
+	with open(logpath, 'r+b') as log:
+		size = log.seek(0, os.SEEK_END)
+		if size == 0:
+			return
+		if binary:
+			if size < binary_log_header.size:
+				log.truncate(0)
+				return
+			log.seek(0)
+			_, version, _ = binary_log_header.unpack(
+					log.read(binary_log_header.size))
+			record = binary_log_records[version]
+			if size < record.size:
+				log.truncate(0)
+			else:
+				log.truncate(size - (size - record.size) % record.size)
+			return
+		end = size
+		while end > 0:
+			start = max(0, end - 4096)
+			log.seek(start)
+			newline = log.read(end - start).rfind(b'\n')
+			if newline != -1:
+				log.truncate(start + newline + 1)
+				return
+			end = start
+		log.truncate(0)
+
+# Appends records to the log in groups: a group is written out when it
+# has every records, or interval seconds after its first record was
+# added, and when the writer is closed. With sync, the log is fsynced
+# on close.
+class LogWriter:
+	def __init__(self, logpath, binary, every=1, interval=0, sync=False):
+		recover_log(logpath, binary)
+		if (binary and os.path.isfile(logpath) and os.path.getsize(logpath) > 0
+				and binary_log_version_of(logpath) != binary_log_version):
+			raise Exception('old binary log, convert it with -B')
+		self.log = open(logpath, mode='ab')
+		self.binary = binary
+		self.every = every
+		self.interval = interval
+		self.sync = sync
+		self.pending = []
+		self.count = 0
+		self.timer = None
+		self.lock = threading.Lock()
+		if binary and self.log.tell() == 0:
+			self.pending.append(binary_log_start())
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc):
+		self.close()
 		return False
-	for i in range(0, len(term_parts)):
-		if term_parts[i].lower() != resp_parts[i].lower():
-			return False
-	return True
 
-def review_loop(terms, logpath, target, id):
-	with open(logpath, mode='a') as log:
-		log.write('id\t{}\n'.format(id))
-		while total_sum(terms) > 0:
-			pick = random.randint(1, total_sum(terms))
-			index = find_term_index(terms, pick)
-			t = terms[index]
-			first = True
-			while True:
-				print("\x1b[2J\x1b[H")
-				if not first:
-					print('Try again!')
-				print(t['def'])
-				resp = input()
-				if match_response(t['target'], resp):
-					delta = 0
+	def session(self, id):
+		with self.lock:
+			if self.binary:
+				self.pending.append(binary_log_session(id))
+			else:
+				self.pending.append('id\t{}\n'.format(id).encode())
+
+	def write(self, key, delta, day, latency=0):
+		with self.lock:
+			self.pending.append(log_record(key, delta, day, self.binary, latency))
+			self.count = self.count + 1
+			if self.count >= self.every:
+				self.flush_locked()
+			elif self.interval > 0 and self.timer is None:
+				self.timer = threading.Timer(self.interval, self.flush)
+				self.timer.daemon = True
+				self.timer.start()
+
+	def flush_locked(self):
+		if self.timer is not None:
+			self.timer.cancel()
+			self.timer = None
+		if len(self.pending) > 0:
+			self.log.write(b''.join(self.pending))
+			self.log.flush()
+			self.pending = []
+		self.count = 0
+
+	def flush(self):
+		with self.lock:
+			if not self.log.closed:
+				self.flush_locked()
+
+	def close(self):
+		with self.lock:
+			self.flush_locked()
+			if self.sync:
+				os.fsync(self.log.fileno())
+			self.log.close()
+
+# Without -n, an interactive session writes every answer
+def open_log(logpath, args):
+	flush_every = args.flush_every if args.flush_every is not None else 1
+	return LogWriter(logpath, use_binary_log(logpath, args.binary_log),
+		flush_every, args.flush_interval / 1000, args.fsync)
+
+# A correct response that took longer than slow milliseconds earns a
+# proportionally smaller delta
+def slow_delta(delta, latency, slow):
+	if slow > 0 and latency > slow:
+		return max(1, delta * slow // latency)
+	return delta
+
+# Updates the term after a correct response, first tells whether it was
+# the first attempt, latency is how long it took in milliseconds.
+# Returns the delta to log, or None if there is nothing to log.
+def grade_correct(terms, index, target, first, day, latency=0, slow=0):
+	delta = 0
+	if first:
+		delta = compute_term_delta(terms['last'][index], day)
+		delta = slow_delta(delta, latency, slow)
+		inc_term_score(terms, index, target, delta, day)
+	else:
+		if terms['score'][index] != 0:
+			terms['last'][index] = day
+	if terms['score'][index] == 0:
+		return None
+	return delta
+
+# A scheduler picks the next term to ask, or None when the session is
+# over, and grades the term once it is answered, see grade_correct for
+# slow. ScoreScheduler draws the terms with a probability proportional
+# to their remaining weight.
+class ScoreScheduler:
+	def __init__(self, terms, target, slow=0):
+		self.terms = terms
+		self.target = target
+		self.slow = slow
+		fill_totals(terms, target)
+
+	def pick(self):
+		total = total_sum(self.terms)
+		if total == 0:
+			return None
+		return find_term_index(self.terms, random.randint(1, total))
+
+	def answered(self, index, first, day, latency=0):
+		return grade_correct(self.terms, index, self.target, first, day,
+			latency, self.slow)
+
+def due_interval(score):
+	return max(1, score // 8)
+
+# Spaced repetition: a term is due due_interval(score) days after it was
+# last answered right the first time, or a day after a retry, new terms
+# right away. The terms below the target score are kept in a heap by
+# due day. Answering a term pushes it again with its new due day, the
+# stale entry is dropped once it gets to the top. Only the terms due by
+# today are asked.
+class DueScheduler:
+	def __init__(self, terms, target, slow=0, *, today=None):
+		if today is None:
+			today = datetime.utcnow().toordinal()
+		self.terms = terms
+		self.target = target
+		self.slow = slow
+		self.today = today
+		self.due = array('i', [-1]) * term_count(terms)
+		self.heap = []
+		for index in range(0, term_count(terms)):
+			if terms['score'][index] < target:
+				due = terms['last'][index] + due_interval(terms['score'][index])
+				self.due[index] = due
+				self.heap.append((due, index))
+		heapq.heapify(self.heap)
+
+	def pick(self):
+		while len(self.heap) > 0:
+			due, index = self.heap[0]
+			if due != self.due[index]:
+				heapq.heappop(self.heap)
+			elif due > self.today:
+				return None
+			else:
+				return index
+		return None
+
+	def answered(self, index, first, day, latency=0):
+		delta = grade_correct(self.terms, index, self.target, first, day,
+			latency, self.slow)
+		score = self.terms['score'][index]
+		if score >= self.target:
+			self.due[index] = -1
+			return delta
+		due = day + 1
+		if first:
+			due = day + due_interval(score)
+		self.due[index] = due
+		heapq.heappush(self.heap, (due, index))
+		return delta
+
+schedulers = {'score': ScoreScheduler, 'due': DueScheduler}
+
+# A near miss is shown the answer, and is scored as a retry: the term
+# stays as due as it was.
+def review_loop(scheduler, log, id, input=input, print=print, tolerance=None):
+	terms = scheduler.terms
+	log.session(id)
+	while True:
+		with metrics.timer('pick'):
+			index = scheduler.pick()
+		if index is None:
+			break
+		first = True
+		start = time.monotonic()
+		while True:
+			print("\x1b[2J\x1b[H")
+			if not first:
+				print('Try again!')
+			print(terms['def'][index])
+			resp = input()
+			result = match.grade(terms['answer'][index], resp, tolerance)
+			if result != match.WRONG:
+				if result == match.NEAR:
+					print('Almost: ' + terms['target'][index])
+					first = False
+				latency = int((time.monotonic() - start) * 1000)
+				with metrics.timer('score_update'):
 					day = datetime.utcnow().toordinal()
-					if first:
-						delta = compute_term_delta(t, day)
-						inc_term_score(terms, index, target, delta, day)
-					else:
-						if t['score'] != 0:
-							terms[index]['last'] = day
-					if t['score'] != 0:
-						log.write('{}\t{}\t{}\n'.format(index, delta, day))
-						log.flush()
-					break;
-				if resp == '':
-					print('It is: ' + t['target'])
+					delta = scheduler.answered(index, first, day, latency)
+					if delta is not None:
+						log.write(terms['key'][index], delta, day, latency)
+				if result == match.NEAR:
 					input()
-				first = False
+				break;
+			if resp == '':
+				print('It is: ' + terms['target'][index])
+				input()
+			first = False
+
+# Grades index<TAB>response[<TAB>day[<TAB>milliseconds]] records without
+# a terminal. A record following a wrong response to the same term is a
+# retry, as in review_loop. Yields (index, result, delta) tuples, result
+# being one of match.EXACT, NEAR and WRONG, delta being None when nothing
+# was logged.
+def grade_batch(terms, target, records, log, tolerance=None, slow=0):
+	today = datetime.utcnow().toordinal()
+	pending = -1
+	for record in records:
+		index = record[0]
+		first = index != pending
+		pending = -1
+		result = match.grade(terms['answer'][index], record[1], tolerance)
+		if result != match.WRONG:
+			day = today
+			if len(record) > 2:
+				day = record[2]
+			latency = 0
+			if len(record) > 3:
+				latency = record[3]
+			first = first and result == match.EXACT
+			delta = grade_correct(terms, index, target, first, day, latency, slow)
+			if delta is not None:
+				log.write(terms['key'][index], delta, day, latency)
+			yield index, result, delta
+		else:
+			pending = index
+			yield index, result, None
+
+def read_batch(path, count):
+	if path == '-':
+		f = sys.stdin
+	else:
+		f = open(path, newline='')
+	with f:
+		for line in f:
+			row = line.rstrip('\r\n').split('\t')
+			if len(row) < 2:
+				continue
+			index = int(row[0])
+			if index < 0 or index >= count:
+				raise Exception('invalid term index: ' + row[0])
+			if len(row) > 3:
+				yield index, row[1], int(row[2]), int(row[3])
+			elif len(row) > 2:
+				yield index, row[1], int(row[2])
+			else:
+				yield index, row[1]
+
+def run_batch(args, terms, logpath, id):
+	counts = [0, 0, 0]
+	names = ['wrong', 'ok', 'near']
+	lines = []
+	if args.flush_every is None:
+		args.flush_every = 4096
+	with open_log(logpath, args) as log:
+		log.session(id)
+		for index, result, delta in grade_batch(terms, args.target_count,
+				read_batch(args.batch, term_count(terms)), log, args.tolerance,
+				args.slow):
+			counts[result] = counts[result] + 1
+			if result != match.WRONG:
+				if delta is None:
+					delta = '-'
+				lines.append('{}\t{}\t{}\n'.format(index, names[result], delta))
+			else:
+				lines.append('{}\twrong\n'.format(index))
+			if len(lines) == 4096:
+				sys.stdout.write(''.join(lines))
+				lines = []
+	sys.stdout.write(''.join(lines))
+	print('ok: {} near: {} wrong: {}'.format(counts[match.EXACT],
+		counts[match.NEAR], counts[match.WRONG]), file=sys.stderr)
 
 def overwrite_csv(path, terms, id):
 	with open(path, mode='w', newline='') as csvfile:
 		writer = csv.writer(csvfile, delimiter='\t', quotechar='|',
 					dialect='unix', quoting=csv.QUOTE_MINIMAL)
 		writer.writerow(['id', id])
-		for term in terms:
-			if term['score'] == 0:
-				writer.writerow([term['target'], term['def']])
+		for target, definition, score, last in zip(terms['target'],
+				terms['def'], terms['score'], terms['last']):
+			if score == 0:
+				writer.writerow([target, definition])
 			else:
-				writer.writerow([term['target'], term['def'],
-						term['score'], term['last']])
+				writer.writerow([target, definition, score, last])
+
+parser = argparse.ArgumentParser(description='practice spelling.')
+parser.add_argument('-p', help='CSV file path',
+		default='pl_vocab_write.csv',
+		dest='path')
+parser.add_argument('-t', help='target write score',
+		default=1000, type=int,
+		dest='target_count')
+parser.add_argument('-m', help='merge counts',
+		action='store_true', dest='merge')
+parser.add_argument('-s', help='starting row', type=int, default=0, dest='start')
+parser.add_argument('-e', help='ending row', type=int, default=0, dest='end')
+parser.add_argument('-b', help='use a binary log for a new log file',
+		action='store_true', dest='binary_log')
+parser.add_argument('-B', help='convert the log file to the binary format',
+		action='store_true', dest='convert_log')
+parser.add_argument('-g', help='grade index<TAB>response lines from a file, - for stdin',
+		dest='batch')
+parser.add_argument('-n', help='write the log after this many answers, default 1, or 4096 with -g',
+		type=int, dest='flush_every')
+parser.add_argument('-i', help='write the log at most this many ms after an answer',
+		type=int, default=0, dest='flush_interval')
+parser.add_argument('-y', help='fsync the log on exit',
+		action='store_true', dest='fsync')
+parser.add_argument('-T', help='write timing metrics to this file, .prom or JSON',
+		dest='metrics')
+parser.add_argument('-L', help='accept answers missing diacritics, or this many edits off, as near misses',
+		type=int, dest='tolerance')
+parser.add_argument('-S', help='how to pick the terms: by remaining score, or by due day',
+		choices=sorted(schedulers), default='score', dest='scheduler')
+parser.add_argument('-w', help='correct answers slower than this many ms earn less',
+		type=int, default=0, dest='slow')
+parser.add_argument('-A', help='merge every deck in a directory, or listed in a file',
+		dest='merge_all')
+
+# Merges the log into the CSV in a single pass over the CSV. Only the
+# deltas of the terms in the log are held in memory, keyed as told in
+# log_slot. The new CSV replaces the old one once it is completely
+# written, and only if every term in the log was found in it.
+def merge_deck(args, logpath):
+	id = read_deck_id(args.path)
+	deltas = defaultdict(int)
+	days = {}
+	replay_log(logpath, id, deltas, days, 0, sys.maxsize)
+	tmp_path = args.path + '.tmp'
+	index = 0
+	matched = 0
+	with open(args.path, newline='') as csvfile, \
+			open(tmp_path, mode='w', newline='') as out:
+		datareader = csv.reader(csvfile, delimiter='\t', quotechar='|')
+		writer = csv.writer(out, delimiter='\t', quotechar='|',
+					dialect='unix', quoting=csv.QUOTE_MINIMAL)
+		first = True
+		row_number = 0
+		for row in datareader:
+			row_number = row_number + 1
+			if len(row) == 0 or row[0].startswith('#'):
+				writer.writerow(row)
+				continue
+			if first:
+				first = False
+				writer.writerow(['id', id + 1])
+				continue
+			assert len(row) == 2 or len(row) == 4
+			score, last = row_score(args, row_number, row)
+			for slot in (-1 - index, term_key(row[0], row[1])):
+				if slot in deltas:
+					score = score + deltas[slot]
+					last = max(last, days[slot])
+					if slot >= 0:
+						matched = matched + 1
+			if score == 0:
+				writer.writerow([row[0], row[1]])
+			else:
+				writer.writerow([row[0], row[1], score, last])
+			index = index + 1
+		out.flush()
+		os.fsync(out.fileno())
+	keyed = sum(1 for slot in deltas if slot >= 0)
+	if (len(deltas) > 0 and -1 - min(deltas) >= index) or matched < keyed:
+		os.remove(tmp_path)
+		raise Exception('log does not match')
+	os.replace(tmp_path, args.path)
+	return id + 1
+
+def merge_path(args, path):
+	logpath = path + '.log'
+	if not os.path.isfile(logpath):
+		return False
+	deck_args = argparse.Namespace(**vars(args))
+	deck_args.path = path
+	merge_deck(deck_args, logpath)
+	if os.path.isfile(checkpoint_path(logpath)):
+		os.remove(checkpoint_path(logpath))
+	return True
+
+# The decks with a log in a directory, or the deck paths listed one per
+# line in a manifest file
+def deck_paths(source):
+	if os.path.isdir(source):
+		paths = [os.path.join(source, name) for name in sorted(os.listdir(source))
+				if name.endswith('.csv')]
+		return [path for path in paths if os.path.isfile(path + '.log')]
+	with open(source) as manifest:
+		return [line.strip() for line in manifest
+				if line.strip() != '' and not line.startswith('#')]
+
+def merge_one(task):
+	args, path = task
+	try:
+		if merge_path(args, path):
+			return path, None
+		return path, 'no log file found'
+	except Exception as e:
+		return path, '%s: %s' % (type(e).__name__, e)
+
+# Merges the decks in a process pool, one process per core. A failing
+# deck is reported and left as it was, the others are still merged.
+# Returns the number of failures.
+def merge_all(args, source):
+	tasks = [(args, path) for path in deck_paths(source)]
+	failures = 0
+	with Pool() as pool:
+		for path, error in pool.imap_unordered(merge_one, tasks):
+			if error is None:
+				print('merged ' + path)
+			else:
+				print(path + ': ' + error, file=sys.stderr)
+				failures = failures + 1
+	return failures
 
 if __name__ == '__main__':
-	parser = argparse.ArgumentParser(description='practice spelling.')
-	parser.add_argument('-p', help='CSV file path',
-			default='pl_vocab_write.csv',
-			dest='path')
-	parser.add_argument('-t', help='target write score',
-			default=1000, type=int,
-			dest='target_count')
-	parser.add_argument('-m', help='merge counts',
-			action='store_true', dest='merge')
-	parser.add_argument('-s', help='starting row', type=int, default=0, dest='start')
-	parser.add_argument('-e', help='ending row', type=int, default=0, dest='end')
 	args = parser.parse_args()
-	id, terms = read_terms(args)
-	if len(terms) == 0:
-		sys.exit(0)
+	metrics.enable(args.metrics)
 	logpath = args.path + '.log'
-	readlog(logpath, terms, id)
+	if args.merge_all is not None:
+		with metrics.timer('merge_all'):
+			failures = merge_all(args, args.merge_all)
+		sys.exit(1 if failures > 0 else 0)
 	if args.merge:
-		if not os.path.isfile(logpath):
+		with metrics.timer('merge'):
+			merged = merge_path(args, args.path)
+		if not merged:
 			print("No log file found")
+		sys.exit(0)
+	with metrics.timer('read_terms'):
+		id, terms = read_terms(args)
+	if term_count(terms) == 0:
+		sys.exit(0)
+	if args.convert_log:
+		if not os.path.isfile(logpath) or (is_binary_log(logpath) and
+				binary_log_version_of(logpath) == binary_log_version):
+			print("No log file to convert found")
 			sys.exit(0)
-		id = id + 1
-		overwrite_csv(args.path, terms, id)
+		convert_log(logpath, terms)
+		if os.path.isfile(checkpoint_path(logpath)):
+			os.remove(checkpoint_path(logpath))
+		sys.exit(0)
+	with metrics.timer('readlog'):
+		readlog_checkpointed(logpath, terms, id)
+	if args.batch is not None:
+		run_batch(args, terms, logpath, id)
 		sys.exit(0)
-	fill_totals(terms, args.target_count)
-	review_loop(terms, logpath, args.target_count, id)
+	with metrics.timer('schedule'):
+		scheduler = schedulers[args.scheduler](terms, args.target_count,
+			args.slow)
+	with open_log(logpath, args) as log:
+		review_loop(scheduler, log, id, tolerance=args.tolerance)